@@ -0,0 +1,99 @@
+"""
+Background saving for the Adventure Game.
+
+Writing a save means encoding it, writing it out and waiting for fsync,
+which is too slow to do in the middle of a map frame. Instead the game
+takes a cheap copy of what it wants saved and hands it to the autosave
+thread with submit(). The thread does the encoding and writing in the
+order jobs arrive. A job waiting in the queue is replaced when a newer
+one for the same file comes in, so a slow disk never builds up a backlog.
+
+The map autosaves every AUTOSAVE_INTERVAL seconds while anything has
+changed (set ADVENTURE_AUTOSAVE to another number of seconds, or 0 to
+only save when leaving the map). Everything queued is written before
+the game exits.
+"""
+
+import atexit
+import os
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+
+AUTOSAVE_INTERVAL = float(os.environ.get("ADVENTURE_AUTOSAVE", "10"))
+
+
+class Autosaver:
+    def __init__(self):
+        """The autosave thread and its queue of jobs, one per key, written oldest first."""
+        self.jobs = OrderedDict()   # key -> (function, args), oldest first
+        self.running = None         # (key, args) of the job being written right now
+        self.condition = threading.Condition()
+        self.thread = None
+
+    # ---------------------------------------------------
+    # Called from the game
+    # ---------------------------------------------------
+    def submit(self, key, function, *args):
+        """
+        Run function(*args) on the autosave thread.
+
+        args must not be changed afterwards; pass a copy of anything the
+        game keeps using. A job with the same key that hasn't started yet
+        is dropped in favour of this one.
+        """
+        with self.condition:
+            self.jobs.pop(key, None)
+            self.jobs[key] = (function, args)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def queued(self, key):
+        """Return the args of the newest job for key that isn't on disk yet, or None."""
+        with self.condition:
+            if key in self.jobs:
+                return self.jobs[key][1]
+            if self.running is not None and self.running[0] == key:
+                return self.running[1]
+            return None
+
+    def wait(self, key):
+        """Wait until the job for key (if any) has been written."""
+        with self.condition:
+            while key in self.jobs or (self.running is not None and self.running[0] == key):
+                self.condition.wait()
+
+    def flush(self):
+        """Wait until every queued job has been written."""
+        with self.condition:
+            while self.jobs or self.running is not None:
+                self.condition.wait()
+
+    # ---------------------------------------------------
+    # The autosave thread
+    # ---------------------------------------------------
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.jobs:
+                    self.condition.wait()
+                key, (function, args) = self.jobs.popitem(last=False)
+                self.running = (key, args)
+            try:
+                function(*args)
+            except Exception:
+                # Losing one autosave is better than losing the thread; the next one tries again
+                print(f"Autosave of {key} failed:", file=sys.__stderr__)
+                traceback.print_exc(file=sys.__stderr__)
+            finally:
+                with self.condition:
+                    self.running = None
+                    self.condition.notify_all()
+
+
+# One autosave thread for the whole process (and every server session)
+service = Autosaver()
+atexit.register(service.flush)
@@ -0,0 +1,373 @@
+"""
+Timing benchmarks for the game's hot paths.
+
+Runs headless (SDL dummy video driver) from the project root:
+
+    python benchmarks/hotpaths.py               # run and compare with the baseline
+    python benchmarks/hotpaths.py --save        # run and store the results as the baseline
+    python benchmarks/hotpaths.py --quick       # skip the biggest sizes
+    python benchmarks/hotpaths.py -k save       # only benchmarks whose name contains "save"
+
+Each benchmark is run several times and the fastest run is kept, since
+slower runs only measure noise from the rest of the machine. Results are
+compared with benchmarks/baseline.json (written by --save on the same
+machine); anything slower than the baseline by more than --threshold is
+flagged and the script exits with status 1.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import autosave
+import gamefunctions
+import gameinput
+import rng
+from content import TABLES
+from wanderingMonster import WanderingMonster
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+QUICK_LIMIT = 10_000
+
+# name -> (function, sizes, unit)
+BENCHMARKS = {}
+
+
+def benchmark(sizes, unit):
+    """
+    Register a benchmark.
+
+    The decorated function does its setup for one size and returns a
+    zero-argument callable; only that callable is timed.
+
+    Parameters:
+        sizes (list): Problem sizes to run the benchmark at.
+        unit (str): What one unit of size is (used for the per-unit time).
+    """
+    def register(function):
+        BENCHMARKS[function.__name__] = (function, sizes, unit)
+        return function
+    return register
+
+
+class ScriptedInput:
+    """Input source that answers every prompt the same way and presses a fixed list of keys, one per frame."""
+    renders = True
+
+    def __init__(self, answer, keys=()):
+        self.answer = answer
+        self.keys = list(keys)
+
+    def ask(self, prompt=""):
+        return self.answer
+
+    def map_frame(self, timestep):
+        import pygame
+        # Every frame also runs one simulation tick, the most a frame normally does
+        if self.keys:
+            return [pygame.event.Event(pygame.KEYDOWN, key=self.keys.pop(0))], 1
+        return [pygame.event.Event(pygame.QUIT)], 0
+
+
+def sturdy_player(items=0):
+    """A player that can't die in a benchmark, carrying items potions and swords."""
+    player = gamefunctions.create_player()
+    player["name"] = "Bench"
+    player["hp"] = 10 ** 9
+    inventory = player["inventory"]
+    for i in range(items):
+        if i % 2:
+            inventory.append({"name": "Health Potion", "type": "special", "effect": "heal"})
+        else:
+            inventory.append({"name": "Sword", "type": "weapon", "maxDurability": 10, "currentDurability": 10})
+    return player
+
+
+# ---------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------
+@benchmark([100, 1_000], "frame")
+def map_frame(frames):
+    """Key presses handled (and frames drawn) by run_map in a 100 x 100 world, one per frame."""
+    import pygame
+    import gamemap
+    world_side = 100
+    pattern = [pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT, pygame.K_UP]
+    player = sturdy_player()
+    start = [world_side // 2, world_side // 2]
+
+    def run():
+        gameinput.source = ScriptedInput("a", pattern * (frames // len(pattern)))
+        state = {"player_pos": list(start), "monsters": [], "world_size": [world_side, world_side]}
+        gamemap.run_map(state, player)
+    return run
+
+
+@benchmark([10, 1_000, 100_000, 1_000_000], "monster")
+def monster_move(count):
+    """One WanderingMonster.move for every monster on a 1000 x 1000 grid."""
+    monsters = WanderingMonster.spawn_monsters(count, 1000, 1000, (0, 0))
+
+    def run():
+        for mon in monsters:
+            mon.move()
+    return run
+
+
+@benchmark([10, 1_000, 100_000, 1_000_000], "monster")
+def population_step(count):
+    """One MonsterPopulation.step (every monster moves once) on a 1000 x 1000 grid; compare with monster_move."""
+    from monsterpopulation import MonsterPopulation
+    population = MonsterPopulation(1000, 1000, (0, 0))
+    population.spawn(count)
+
+    def run():
+        population.step()
+    return run
+
+
+@benchmark([10, 1_000, 100_000], "monster")
+def population_at(count):
+    """A MonsterPopulation.step, then looking up the tile of every monster, on a 1000 x 1000 grid."""
+    from monsterpopulation import MonsterPopulation
+    population = MonsterPopulation(1000, 1000, (0, 0))
+    population.spawn(count)
+
+    def run():
+        population.step()
+        for x, y in zip(population.x.tolist(), population.y.tolist()):
+            population.at((x, y))
+    return run
+
+
+@benchmark([100, 1_000], "tick")
+def world_step(ticks):
+    """ChunkedWorld.step with 50 monsters in every chunk, the player moving to a new tile every 10 ticks."""
+    from occupancy import OccupancyGrid
+    from world import ChunkedWorld
+    world = ChunkedWorld(400, 400, (0, 0), "bench.chunks", OccupancyGrid(), 16, 50,
+                         active_radius=2, near_radius=10)
+    lap = [(x, 100) for x in range(100, 300, 4)] + [(300, y) for y in range(100, 300, 4)]
+    lap += lap[::-1]
+
+    def run():
+        for tick in range(ticks):
+            if tick % 10 == 0:
+                world.activate(lap[tick // 10 % len(lap)])
+            world.step()
+    return run
+
+
+@benchmark([10, 1_000, 100_000, 1_000_000], "monster")
+def spawn_monsters(count):
+    """WanderingMonster.spawn_monsters on a 1000 x 1000 grid."""
+    def run():
+        WanderingMonster.spawn_monsters(count, 1000, 1000, (0, 0))
+    return run
+
+
+@benchmark([1_000], "fight")
+def fight_monster(count):
+    """Interactive fights against random monsters, always attacking."""
+    player = sturdy_player()
+
+    def run():
+        gameinput.source = ScriptedInput("a")
+        for _ in range(count):
+            gamefunctions.fight_monster(player)
+    return run
+
+
+@benchmark([1_000, 1_000_000], "fight")
+def fight_calculator(count):
+    """fightcalc.resolve_fights on count random monsters in one call, after checking it against combat."""
+    import numpy as np
+    import fightcalc
+    # A fast calculator that has drifted from the real rules isn't worth timing
+    mismatches = fightcalc.compare_with_combat(2_000)
+    if mismatches:
+        raise AssertionError(f"fightcalc.resolve_fights disagrees with combat.resolve_fight: {mismatches[0]}")
+    generator = np.random.default_rng(count)
+    hp = generator.integers(TABLES.encounter_hp[0], TABLES.encounter_hp[1] + 1, count)
+    damage = generator.integers(TABLES.encounter_damage[0], TABLES.encounter_damage[1] + 1, count)
+    stats = fightcalc.player_stats(sturdy_player())
+
+    def run():
+        fightcalc.resolve_fights(monster_hp=hp, monster_damage=damage, **stats)
+    return run
+
+
+@benchmark([10, 1_000, 100_000], "item")
+def save_game(items):
+    """save_game with a player carrying items inventory entries."""
+    player = sturdy_player(items)
+
+    def run():
+        gamefunctions.save_game(player, "bench.sav")
+    return run
+
+
+@benchmark([10, 1_000, 100_000], "item")
+def load_game(items):
+    """load_game of a save holding items inventory entries."""
+    gamefunctions.save_game(sturdy_player(items), "bench.sav")
+
+    def run():
+        gamefunctions.load_game("bench.sav")
+    return run
+
+
+def map_state(monsters):
+    spawned = WanderingMonster.spawn_monsters(monsters, 1000, 1000, (0, 0))
+    return {
+        "player_pos": [5, 5],
+        "world_size": [1000, 1000],
+        "monsters": [{"name": m.name, "pos": list(m.position()), "gold": m.gold} for m in spawned],
+        "npcs": [{"name": npc.name, "item": dict(npc.item) if npc.item else None} for npc in TABLES.npcs],
+    }
+
+
+@benchmark([10, 10_000, 100_000], "monster")
+def save_map_state(monsters):
+    """save_map_state of a map holding monsters monsters."""
+    state = map_state(monsters)
+
+    def run():
+        gamefunctions.save_map_state(state, "bench.sav")
+    return run
+
+
+@benchmark([10, 10_000, 100_000], "monster")
+def load_map_state(monsters):
+    """load_map_state of a map holding monsters monsters."""
+    gamefunctions.save_map_state(map_state(monsters), "bench.sav")
+
+    def run():
+        gamefunctions.load_map_state("bench.sav")
+    return run
+
+
+# ---------------------------------------------------
+# Runner
+# ---------------------------------------------------
+def time_benchmark(function, size, repeat, min_time=0.05):
+    """Return the fastest time for one call out of repeat rounds, in seconds."""
+    rng.service.reseed(size)
+    run = function(size)
+    gc.collect()
+
+    # Fast benchmarks are called several times per round so the timer's resolution doesn't matter
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 10
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:7.2f} {unit}"
+    return f"{seconds / 1e-9:7.2f} ns"
+
+
+def compare(seconds, baseline, threshold):
+    if baseline is None:
+        return ""
+    change = seconds / baseline - 1
+    if change > threshold:
+        return f"{change:+7.1%}  REGRESSION"
+    if change < -threshold:
+        return f"{change:+7.1%}  faster"
+    return f"{change:+7.1%}"
+
+
+def run_all(names, quick, repeat, baseline, threshold):
+    """Run the benchmarks; return (results, regression names)."""
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, "w") as devnull:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        live_input = gameinput.source
+        try:
+            for name in names:
+                function, sizes, unit = BENCHMARKS[name]
+                for size in sizes:
+                    if quick and size > QUICK_LIMIT:
+                        continue
+                    key = f"{name}[{size}]"
+                    with redirect_stdout(devnull):
+                        seconds = time_benchmark(function, size, repeat)
+                    # Writes queued by the benchmark shouldn't slow down the next one
+                    autosave.service.flush()
+                    gc.collect()
+                    results[key] = seconds
+                    note = compare(seconds, baseline.get(key), threshold)
+                    if note.endswith("REGRESSION"):
+                        regressions.append(key)
+                    print(f"{key:<28} {format_time(seconds)}  {format_time(seconds / size)}/{unit:<8} {note}")
+        finally:
+            autosave.service.flush()
+            gameinput.source = live_input
+            os.chdir(cwd)
+    return results, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the game's hot paths.")
+    parser.add_argument("-k", dest="pattern", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--quick", action="store_true", help=f"skip sizes above {QUICK_LIMIT:,}")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark; the fastest is kept")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline results file")
+    parser.add_argument("--save", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown that counts as a regression (default 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    names = [name for name in BENCHMARKS if args.pattern in name]
+    results, regressions = run_all(names, args.quick, args.repeat, baseline, args.threshold)
+
+    if args.save:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                # Keep baseline entries for benchmarks that weren't run this time
+                results = {**json.load(f)["results"], **results}
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": platform.node(), "python": platform.python_version(),
+                       "results": results}, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Memory benchmark for wandering monsters and NPCs.
+
+Spawns a large number of monsters (1,000,000 by default) and reports how
+many bytes each one costs. Run from the project root:
+
+    python benchmarks/memory_monsters.py [count]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wanderingMonster import WanderingMonster
+from npc import NPC
+
+
+def measure(label, count, build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = build(count)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {count:>10,} objects  {size / count:8.1f} bytes each  "
+          f"{size / 1024 / 1024:8.1f} MiB total  {elapsed:6.2f}s")
+    return objects
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    measure("monsters", count, lambda n: WanderingMonster.spawn_monsters(n, 10, 10, (0, 0)))
+    measure("npcs", count, lambda n: [NPC("Old Man", (3, 3), "Hello!") for _ in range(n)])
+
+
+if __name__ == "__main__":
+    main()
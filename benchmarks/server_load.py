@@ -0,0 +1,141 @@
+"""
+Load test for server.py.
+
+Starts a server on a free port (JSON protocol, saves in a temporary
+folder) and connects many scripted players to it at once. Each player
+logs in, starts a new game, does random town actions (fighting, resting,
+shopping, checking the inventory), walks around the map and quits.
+Reports how long the server took to answer each input, from sending it
+to the next prompt arriving. Run from the project root:
+
+    python benchmarks/server_load.py [--clients 200] [--actions 40]
+    python benchmarks/server_load.py --connect 127.0.0.1:4000    # use a running server
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Answers for every prompt that isn't a menu choice
+ANSWERS = {
+    "Enter your name: ": "Bot",
+    "(A)ttack, (R)un: ": "a",
+    "Choose item: ": "1",
+    "Choose an option: ": "e",
+    "Choose weapon number: ": "1",
+}
+TOWN_ACTIONS = ["2", "3", "4", "5"]
+MAP_MOVES = ["w", "a", "s", "d"]
+
+
+async def play(client, address, actions, latencies, seed):
+    """Play one scripted session; return True if the game ran to the end (quitting on the map)."""
+    chooser = random.Random(seed)
+    if isinstance(address, str):
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address)
+
+    started = False
+    quit_map = False
+    on_map = 0
+    sent_at = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                # A game that crashed closes the connection too, so only a quit from the map counts
+                return started and quit_map
+            message = json.loads(line)
+            if "prompt" not in message:
+                continue
+            if sent_at is not None:
+                latencies.append(time.perf_counter() - sent_at)
+
+            prompt = message["prompt"]
+            if prompt == "Login name: ":
+                answer = f"bot{client}"
+            elif prompt in ANSWERS:
+                answer = ANSWERS[prompt]
+            elif prompt.startswith("Move"):
+                on_map -= 1
+                answer = chooser.choice(MAP_MOVES) if on_map > 0 else "q"
+                quit_map = answer == "q"
+            elif not started:
+                answer, started = "1", True
+            elif actions > 0:
+                actions -= 1
+                answer = chooser.choice(TOWN_ACTIONS)
+            else:
+                # Finish with a walk on the map; quitting there ends the game
+                answer, on_map = "1", 10
+
+            writer.write((json.dumps({"input": answer}) + "\n").encode("utf-8"))
+            sent_at = time.perf_counter()
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+async def run(address, clients, actions, seed):
+    latencies = []
+    start = time.perf_counter()
+    finished = await asyncio.gather(*(play(i, address, actions, latencies, seed + i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{clients} sessions, {sum(finished)} played to the end (the rest died), in {elapsed:.2f}s")
+    print(f"{len(latencies):,} inputs answered, {len(latencies) / elapsed:,.0f}/s")
+    if latencies:
+        print("latency  " + "  ".join(f"p{int(p * 100)} {percentile(latencies, p) * 1000:.2f} ms"
+                                      for p in (0.5, 0.95, 0.99)))
+
+
+def start_server(save_root, max_sessions):
+    """Start server.py on a free port; return (process, (host, port))."""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "server.py"), "--protocol", "json", "--port", "0",
+         "--save-root", save_root, "--max-sessions", str(max_sessions)],
+        stdout=subprocess.PIPE, text=True, cwd=ROOT)
+    banner = process.stdout.readline()
+    host, port = banner.rsplit("(", 1)[1].split(")")[0].replace("'", "").split(", ")[:2]
+    return process, (host, int(port))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the game server.")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--actions", type=int, default=40, help="town actions per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--connect", default=None, help="HOST:PORT or a Unix socket path of a running JSON server")
+    args = parser.parse_args()
+
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        address = (host, int(port)) if port.isdigit() else args.connect
+        asyncio.run(run(address, args.clients, args.actions, args.seed))
+        return
+
+    with tempfile.TemporaryDirectory() as save_root:
+        process, address = start_server(save_root, args.clients)
+        try:
+            asyncio.run(run(address, args.clients, args.actions, args.seed))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Cold-start import benchmark for text-only sessions.
+
+Runs `python -X importtime -c "import game"` several times in fresh
+processes and reports the total import time of the game modules, and how
+much of it pygame accounts for. Run from the project root:
+
+    python benchmarks/startup_importtime.py [repeats]
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module="game"):
+    """Return {module name: cumulative microseconds} for one cold import."""
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # "import time:      self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    totals = []
+    pygame_times = []
+    for _ in range(repeats):
+        times = import_times()
+        totals.append(times.get("game", 0))
+        pygame_times.append(times.get("pygame", 0))
+
+    totals.sort()
+    median = totals[len(totals) // 2]
+    print(f"import game: median {median / 1000:.1f} ms, best {totals[0] / 1000:.1f} ms over {repeats} runs")
+    print(f"pygame share: {sorted(pygame_times)[len(pygame_times) // 2] / 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Combat rules for the Adventure Game, with no input() or print().
+
+resolve_fight plays out one fight between the player and a monster and
+returns what happened. The interactive fights in gamefunctions are thin
+front-ends over it, and simulations can call it directly.
+"""
+
+import rng
+from content import TABLES
+from events import emit, item_position, DurabilityUsed, HpChanged, ItemRemoved, MonsterDefeated
+from inventory import Inventory
+
+
+def always_attack(player, monster, monster_hp):
+    """Strategy that never runs away."""
+    return "attack"
+
+
+def find_charm(inventory):
+    """Return the first auto-kill item in the inventory, or None."""
+    if isinstance(inventory, Inventory):
+        return inventory.first(type="special", effect="auto_kill")
+    for item in inventory:
+        if item["type"] == "special" and item["effect"] == "auto_kill":
+            return item
+    return None
+
+
+def resolve_fight(player, monster, strategy=always_attack, report=None, loot_rng=None):
+    """
+    Fight a monster until one side drops or the player runs.
+
+    The player dict is updated (hp, gold, weapon durability and inventory)
+    through events.emit, exactly as the interactive fight does.
+
+    Parameters:
+        player (dict): The player.
+        monster (dict): Needs "name", "hp" and "damage". "gold" is the
+            reward; if missing, 5-20 gold is rolled on victory.
+        strategy (callable): strategy(player, monster, monster_hp) is asked
+            at the start of every turn and returns "attack" or "run".
+        report (callable, optional): report(event, amount) is called as the
+            fight unfolds. Events are "charm", "weapon_broke", "hit" and "hurt".
+        loot_rng (random.Random, optional): Rolls the gold. Defaults to the "loot" stream.
+
+    Returns:
+        dict: outcome ("won", "ran" or "died"), turns, damage_dealt,
+        damage_taken, durability_used, charm_used, weapon_broke and gold_gained.
+    """
+    result = {
+        "outcome": None,
+        "turns": 0,
+        "damage_dealt": 0,
+        "damage_taken": 0,
+        "durability_used": 0,
+        "charm_used": False,
+        "weapon_broke": False,
+        "gold_gained": 0
+    }
+    monster_hp = monster["hp"]
+    monster_dmg = monster["damage"]
+    # Nothing else joins or leaves the inventory mid-fight, so the weapon stays where it is
+    weapon_position = None
+
+    while monster_hp > 0 and player["hp"] > 0:
+        if strategy(player, monster, monster_hp) == "run":
+            result["outcome"] = "ran"
+            return result
+        result["turns"] += 1
+
+        charm = find_charm(player["inventory"])
+        if charm is not None:
+            emit(player, ItemRemoved(item_position(player["inventory"], charm), "charm"))
+            result["charm_used"] = True
+            if report:
+                report("charm", 0)
+            monster_hp = 0
+            break
+
+        dmg = player["damage"]
+        weapon = player["equipped_weapon"]
+        if weapon:
+            dmg += weapon["damage_bonus"]
+            if weapon_position is None:
+                weapon_position = item_position(player["inventory"], weapon)
+            emit(player, DurabilityUsed(weapon_position, 1))
+            result["durability_used"] += 1
+            if weapon["currentDurability"] <= 0:
+                if report:
+                    report("weapon_broke", 0)
+                # Removing the equipped weapon also unequips it
+                emit(player, ItemRemoved(weapon_position, "broke"))
+                result["weapon_broke"] = True
+
+        monster_hp -= dmg
+        result["damage_dealt"] += dmg
+        if report:
+            report("hit", dmg)
+
+        if monster_hp <= 0:
+            break
+
+        emit(player, HpChanged(-monster_dmg, monster["name"]))
+        result["damage_taken"] += monster_dmg
+        if report:
+            report("hurt", monster_dmg)
+
+    if player["hp"] <= 0:
+        result["outcome"] = "died"
+        return result
+
+    if "gold" in monster:
+        gold = monster["gold"]
+    else:
+        gold = TABLES.encounter_gold.pick(loot_rng or rng.stream("loot"))
+    emit(player, MonsterDefeated(monster["name"], gold))
+    result["gold_gained"] = gold
+    result["outcome"] = "won"
+    return result
@@ -0,0 +1,223 @@
+"""
+Game content (monsters, shop items, NPCs) loaded from data files.
+
+Every .json (and, on Python 3.11+, .toml) file in content/ is read in
+name order and merged: sections that are tables are updated key by key,
+sections that are lists are appended to, so a content pack only has to
+list what it adds or changes. The result is compiled once into
+read-only tables (tuples, named tuples and mapping proxies, with names
+interned) that the rest of the game reads directly, so nothing is
+parsed or rebuilt per call.
+
+Anything picked at random (monster types, gold drops) is compiled into
+a sampling.WeightedTable, so a pick costs the same however many entries
+a table has. Spawns are weighted per zone; zones are rings around the
+town, picked by a tile's distance from it.
+
+The compiled tables are cached in content/__pycache__, keyed by a hash
+of the data files, so startup skips parsing until the content changes.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import pickle
+import sys
+from collections import namedtuple
+from types import MappingProxyType
+
+import savefile
+from sampling import WeightedTable
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content")
+
+# Bump when the compiled layout changes so old caches are ignored
+CACHE_VERSION = 2
+
+Tables = namedtuple("Tables", [
+    "content_hash",
+    "monster_names", "monster_colors", "monster_behaviors",
+    "encounter_monsters", "encounter_hp", "encounter_damage", "encounter_gold",
+    "wandering_hp", "wandering_damage",
+    "zones", "zone_depths",
+    "shop", "shop_by_key",
+    "npcs",
+])
+ShopItem = namedtuple("ShopItem", ["key", "name", "price", "description", "item"])
+NPCSpec = namedtuple("NPCSpec", ["name", "position", "dialogue", "item"])
+# Tiles up to max_depth steps from town (None: any further) spawn from this zone's tables
+Zone = namedtuple("Zone", ["name", "max_depth", "monsters", "gold"])
+
+
+# ---------------------------------------------------
+# Reading and merging data files
+# ---------------------------------------------------
+def content_files(directory):
+    names = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+    return [os.path.join(directory, name) for name in names if name.endswith((".json", ".toml"))]
+
+
+def parse(filename, data):
+    if filename.endswith(".toml"):
+        import tomllib
+        return tomllib.loads(data.decode("utf-8"))
+    return json.loads(data)
+
+
+def merge(documents):
+    merged = {}
+    for document in documents:
+        for section, value in document.items():
+            if isinstance(value, dict):
+                merged.setdefault(section, {}).update(value)
+            elif isinstance(value, list):
+                merged.setdefault(section, []).extend(value)
+            else:
+                merged[section] = value
+    return merged
+
+
+# ---------------------------------------------------
+# Compiling
+# ---------------------------------------------------
+def freeze_item(item):
+    return MappingProxyType({sys.intern(k): v for k, v in item.items()}) if item else None
+
+
+def weighted(spec):
+    """
+    Compile a random pick into a WeightedTable.
+
+    spec is {value: weight}, a list of equally likely values, or a
+    [low, high] pair of ints meaning every whole number in between.
+    """
+    if isinstance(spec, dict):
+        values = [int(value) if value.lstrip("-").isdigit() else sys.intern(value) for value in spec]
+        return WeightedTable(values, list(spec.values()))
+    if len(spec) == 2 and all(isinstance(value, int) for value in spec):
+        return WeightedTable(range(spec[0], spec[1] + 1))
+    return WeightedTable([sys.intern(value) for value in spec])
+
+
+def compile_zones(zones, monsters, default_gold):
+    if not zones:
+        zones = [{"name": "everywhere", "monsters": list(monsters)}]
+    compiled = [(zone["name"], zone.get("max_depth"), weighted(zone["monsters"]),
+                 weighted(zone.get("gold", default_gold)))
+                for zone in zones]
+    # Innermost ring first; the open-ended zone goes last
+    return sorted(compiled, key=lambda zone: float("inf") if zone[1] is None else zone[1])
+
+
+def compile_tables(data, content_hash):
+    """Turn merged content into plain, picklable tables (frozen later by freeze)."""
+    monsters = data.get("monsters", {})
+    encounters = data.get("encounters", {})
+    wandering = data.get("wandering", {})
+    return {
+        "content_hash": content_hash,
+        "monster_names": [sys.intern(name) for name in monsters],
+        "monster_colors": {name: tuple(spec["color"]) for name, spec in monsters.items()},
+        "monster_behaviors": {name: spec.get("behavior", "wander") for name, spec in monsters.items()},
+        "encounter_monsters": weighted(encounters.get("monsters", list(monsters))),
+        "encounter_hp": tuple(encounters.get("hp", (10, 20))),
+        "encounter_damage": tuple(encounters.get("damage", (2, 7))),
+        "encounter_gold": weighted(encounters.get("gold", (5, 20))),
+        "wandering_hp": wandering.get("hp", 20),
+        "wandering_damage": wandering.get("damage", 5),
+        "zones": compile_zones(data.get("zones", []), monsters, wandering.get("gold", (5, 20))),
+        # Shop entries are numbered in the order they're listed
+        "shop": [(str(i), entry["item"]["name"], entry["price"], entry.get("description", ""), entry["item"])
+                 for i, entry in enumerate(data.get("shop", []), 1)],
+        "npcs": [(npc["name"], tuple(npc["position"]), npc.get("dialogue", ""), npc.get("item"))
+                 for npc in data.get("npcs", [])],
+    }
+
+
+def freeze(compiled):
+    """Wrap compiled tables in read-only containers."""
+    shop = tuple(ShopItem(key, sys.intern(name), price, description, freeze_item(item))
+                 for key, name, price, description, item in compiled["shop"])
+    zones = tuple(Zone(*zone) for zone in compiled["zones"])
+    return Tables(
+        content_hash=compiled["content_hash"],
+        monster_names=tuple(compiled["monster_names"]),
+        monster_colors=MappingProxyType(compiled["monster_colors"]),
+        monster_behaviors=MappingProxyType(compiled["monster_behaviors"]),
+        encounter_monsters=compiled["encounter_monsters"],
+        encounter_hp=compiled["encounter_hp"],
+        encounter_damage=compiled["encounter_damage"],
+        encounter_gold=compiled["encounter_gold"],
+        wandering_hp=compiled["wandering_hp"],
+        wandering_damage=compiled["wandering_damage"],
+        zones=zones,
+        zone_depths=tuple(float("inf") if zone.max_depth is None else zone.max_depth for zone in zones),
+        shop=shop,
+        shop_by_key=MappingProxyType({entry.key: entry for entry in shop}),
+        npcs=tuple(NPCSpec(sys.intern(name), position, dialogue, freeze_item(item))
+                   for name, position, dialogue, item in compiled["npcs"]),
+    )
+
+
+# ---------------------------------------------------
+# Loading
+# ---------------------------------------------------
+def load(directory=CONTENT_DIR, cache=True):
+    """
+    Load and compile every content file in a directory.
+
+    Parameters:
+        directory (str): Folder holding the .json/.toml content files.
+        cache (bool): Read and write the compiled tables in directory/__pycache__.
+
+    Returns:
+        Tables: The compiled, read-only content.
+    """
+    files = content_files(directory)
+    raw = []
+    digest = hashlib.sha256(f"content-v{CACHE_VERSION}".encode("utf-8"))
+    for filename in files:
+        with open(filename, "rb") as f:
+            data = f.read()
+        raw.append((filename, data))
+        digest.update(os.path.basename(filename).encode("utf-8") + b"\0" + data)
+    content_hash = digest.hexdigest()
+
+    cache_file = os.path.join(directory, "__pycache__", f"content-{content_hash[:16]}.pickle")
+    if cache and os.path.exists(cache_file):
+        try:
+            with open(cache_file, "rb") as f:
+                compiled = pickle.load(f)
+            if compiled.get("content_hash") == content_hash:
+                return freeze(compiled)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass  # A broken cache is rebuilt below
+
+    compiled = compile_tables(merge(parse(filename, data) for filename, data in raw), content_hash)
+    if cache:
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            savefile.atomic_write(cache_file, pickle.dumps(compiled, pickle.HIGHEST_PROTOCOL))
+            for name in os.listdir(os.path.dirname(cache_file)):
+                stale = os.path.join(os.path.dirname(cache_file), name)
+                if name.startswith("content-") and stale != cache_file:
+                    os.remove(stale)
+        except OSError:
+            pass  # Read-only install; just parse next time too
+    return freeze(compiled)
+
+
+# The game's content, loaded once at startup
+TABLES = load()
+
+
+def zone_index(depth, tables=None):
+    """Return the index in tables.zones of the zone a tile depth steps from town is in."""
+    tables = tables or TABLES
+    return min(bisect.bisect_left(tables.zone_depths, depth), len(tables.zones) - 1)
+
+
+def zone_at(depth):
+    """Return the Zone for a tile depth steps from town."""
+    return TABLES.zones[zone_index(depth)]
@@ -0,0 +1,407 @@
+"""
+Everything that happens to the player, as a log of events.
+
+Game code doesn't edit the player dict itself: it describes the change
+as an event (GoldChanged, ItemAdded, DurabilityUsed, ...) and hands it
+to emit(), which applies it and, when the session has an EventLog,
+appends it there too. A saved player is then a snapshot plus the events
+since, so a crash costs at most the action that was in progress, and
+anything that wants to follow a game (analytics, balancing scripts) can
+read the log while it grows:
+
+    python events.py savegame.sav.events [--follow]
+
+Each log line is a JSON list, [seq, event type, fields...]. Items are
+referred to by their Inventory position. A removed item's position isn't
+reused, and positions are only renumbered when a snapshot is written, so
+they are the same in a running game and after loading it again.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+
+import autosave
+import savefile
+
+# The log the current session's events go to; None (simulations, benchmarks) just applies them
+current_log = contextvars.ContextVar("event_log", default=None)
+
+
+# ---------------------------------------------------
+# Events
+# ---------------------------------------------------
+class Event:
+    """Base class for events. Each one lists its fields in __slots__ and knows how to apply itself."""
+    __slots__ = ()
+
+    def fields(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def apply(self, player):
+        raise NotImplementedError
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.fields() == other.fields()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(repr(value) for value in self.fields())})"
+
+
+class GoldChanged(Event):
+    __slots__ = ("amount", "reason")
+
+    def __init__(self, amount, reason):
+        self.amount = amount
+        self.reason = reason
+
+    def apply(self, player):
+        player["gold"] += self.amount
+
+
+class HpChanged(Event):
+    __slots__ = ("amount", "reason")
+
+    def __init__(self, amount, reason):
+        self.amount = amount
+        self.reason = reason
+
+    def apply(self, player):
+        player["hp"] += self.amount
+
+
+class ItemAdded(Event):
+    __slots__ = ("item",)
+
+    def __init__(self, item):
+        self.item = item
+
+    def apply(self, player):
+        player["inventory"].append(self.item)
+
+
+class ItemRemoved(Event):
+    __slots__ = ("position", "reason")
+
+    def __init__(self, position, reason):
+        self.position = position
+        self.reason = reason
+
+    def apply(self, player):
+        item = item_at(player["inventory"], self.position)
+        player["inventory"].remove(item)
+        if player["equipped_weapon"] is item:
+            player["equipped_weapon"] = None
+
+
+class DurabilityUsed(Event):
+    __slots__ = ("position", "amount")
+
+    def __init__(self, position, amount):
+        self.position = position
+        self.amount = amount
+
+    def apply(self, player):
+        item_at(player["inventory"], self.position)["currentDurability"] -= self.amount
+
+
+class WeaponEquipped(Event):
+    __slots__ = ("position",)
+
+    def __init__(self, position):
+        self.position = position  # None when the weapon is put away
+
+    def apply(self, player):
+        player["equipped_weapon"] = None if self.position is None else item_at(player["inventory"], self.position)
+
+
+class MonsterDefeated(Event):
+    """The loot is part of the event, so a win is one line in the log."""
+    __slots__ = ("name", "gold")
+
+    def __init__(self, name, gold):
+        self.name = name
+        self.gold = gold
+
+    def apply(self, player):
+        player["gold"] += self.gold
+
+
+EVENT_TYPES = {cls.__name__: cls for cls in (
+    GoldChanged, HpChanged, ItemAdded, ItemRemoved, DurabilityUsed, WeaponEquipped, MonsterDefeated)}
+
+
+def emit(player, event):
+    """Apply an event to the player and log it for the current session."""
+    event.apply(player)
+    log = current_log.get()
+    if log is not None:
+        log.append(event)
+
+
+def item_position(inventory, item):
+    """Return where an item sits in an inventory (an Inventory or a plain list)."""
+    if hasattr(inventory, "position"):
+        return inventory.position(item)
+    for position, other in enumerate(inventory):
+        if other is item:
+            return position
+    raise ValueError("item not in inventory")
+
+
+def item_at(inventory, position):
+    """Return the item at a position given by item_position."""
+    if hasattr(inventory, "at"):
+        return inventory.at(position)
+    return inventory[position]
+
+
+# ---------------------------------------------------
+# Reading and writing log lines
+# ---------------------------------------------------
+def encode_event(seq, event):
+    return json.dumps([seq, type(event).__name__, *event.fields()], separators=(",", ":")) + "\n"
+
+
+def decode_event(line):
+    """Return (seq, event) for one log line."""
+    seq, name, *fields = json.loads(line)
+    return seq, EVENT_TYPES[name](*fields)
+
+
+def read_log(path, after=0):
+    """
+    Yield (seq, event) for every complete line of a log, oldest first.
+
+    Parameters:
+        path (str): The .events file.
+        after (int): Skip events up to and including this seq.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                return  # a crash mid-append leaves at most one torn line at the end
+            try:
+                seq, event = decode_event(line)
+            except (ValueError, KeyError, TypeError):
+                return
+            if seq > after:
+                yield seq, event
+
+
+def follow_log(path, after=0, poll=0.5):
+    """Like read_log, but keep waiting for new events; for watching a game being played."""
+    while True:
+        for seq, event in read_log(path, after):
+            after = seq
+            yield seq, event
+        time.sleep(poll)
+
+
+# ---------------------------------------------------
+# The log on disk
+# ---------------------------------------------------
+class EventLog:
+    def __init__(self, filename, fmt="json", section="player", compact_every=500):
+        """
+        Append-only event log for one section of a save container.
+
+        The container holds the last snapshot of the section and, in its
+        "events" section, the seq of the last event folded into it. Events
+        after that live in filename + ".events". Events are written in one
+        go per flush(), so a game action costs one append and one fsync.
+        compact() writes a fresh snapshot and drops the events it covers.
+        Both can be left to the autosave thread.
+
+        Parameters:
+            filename (str): The save container.
+            fmt (str): Format for snapshots ("json" or "binary").
+            section (str): Container section holding the snapshot.
+            compact_every (int): due() is true once this many events have piled up since the snapshot.
+        """
+        # Absolute, since the autosave thread may write after the working directory changed
+        self.filename = os.path.abspath(filename)
+        self.path = self.filename + ".events"
+        self.fmt = fmt
+        self.section = section
+        self.compact_every = compact_every
+        self.seq = 0             # last event appended
+        self.snapshot_seq = 0    # last event the snapshot on disk includes
+        self.pending = []        # encoded events not yet written
+        self.owned = False       # the file on disk continues this log's events (after load or compact)
+        self.lock = threading.Lock()       # guards pending and seq
+        self.file_lock = threading.Lock()  # held while the log file is appended to or rewritten
+
+    def load(self):
+        """
+        Read the snapshot and the events logged after it.
+
+        Returns:
+            tuple: (snapshot data or None if there's no save, list of events to apply to it)
+        """
+        container = savefile.SaveContainer(self.filename, self.fmt)
+        data = container.get(self.section)
+        self.snapshot_seq = self.seq = container.get("events", {}).get("seq", 0)
+        replay = []
+        good_size = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        seq, event = decode_event(line)
+                    except (ValueError, KeyError, TypeError):
+                        break
+                    good_size += len(line)
+                    if seq > self.snapshot_seq:
+                        replay.append(event)
+                        self.seq = seq
+            if good_size < os.path.getsize(self.path):
+                # Cut off a torn last line so new events don't end up behind it
+                with open(self.path, "r+b") as f:
+                    f.truncate(good_size)
+        # With no save to continue, whatever events are on disk are left for compact() to clear
+        self.owned = data is not None
+        return data, replay
+
+    def append(self, event):
+        """Queue an event for the next flush()."""
+        with self.lock:
+            self.seq += 1
+            self.pending.append(encode_event(self.seq, event))
+
+    def flush(self, background=False):
+        """
+        Write queued events to disk and fsync them.
+
+        Parameters:
+            background (bool): Leave the writing to the autosave thread.
+        """
+        if background:
+            autosave.service.submit(self.path, self.write_pending)
+        else:
+            self.write_pending()
+
+    def write_pending(self):
+        # Whoever holds file_lock writes everything queued so far, so lines always land in seq order
+        with self.file_lock:
+            with self.lock:
+                lines, self.pending = self.pending, []
+            if not lines:
+                return
+            with open(self.path, "ab") as f:
+                f.write("".join(lines).encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def discard(self):
+        """Drop queued events, e.g. those of an action that never finished."""
+        with self.lock:
+            self.seq -= len(self.pending)
+            self.pending = []
+
+    def snapshot_key(self):
+        return self.filename + " snapshot"
+
+    def due(self):
+        """True when enough events have piled up that compact() is worth it."""
+        busy = autosave.service.queued(self.snapshot_key()) is not None
+        return not busy and self.seq - self.snapshot_seq >= self.compact_every
+
+    def compact(self, data, background=False):
+        """
+        Make data the new snapshot and drop the events it includes.
+
+        data must be the section as it is after every event appended so
+        far. A log that was never load()ed starts over: whatever was on
+        disk belonged to an older game and data replaces it.
+
+        Parameters:
+            data (dict): The section's current save data.
+            background (bool): Leave the writing to the autosave thread and return at once.
+        """
+        self.wait()
+        if self.owned:
+            self.flush(background)
+        else:
+            self.discard()
+            self.seq = 0
+            with self.file_lock:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+            self.owned = True
+
+        if background:
+            # The game keeps changing its items while the snapshot is written
+            data = dict(data, inventory=[dict(item) for item in data["inventory"]])
+            autosave.service.submit(self.snapshot_key(), self.write_snapshot, data, self.seq)
+        else:
+            self.write_snapshot(data, self.seq)
+
+    def write_snapshot(self, data, seq):
+        container = savefile.SaveContainer(self.filename, self.fmt)
+        container.set(self.section, data)
+        container.set("events", {"seq": seq})
+        try:
+            container.save()
+        except BaseException:
+            # Events after seq count item positions from this snapshot, so they can't go on top of the
+            # old one; give up the file on disk and let the next flush write a whole snapshot instead
+            self.owned = False
+            raise
+
+        with self.file_lock:
+            # Keep only events appended while the snapshot was being written
+            kept = []
+            if os.path.exists(self.path):
+                with open(self.path, "rb") as f:
+                    for line in f:
+                        try:
+                            if json.loads(line)[0] > seq:
+                                kept.append(line)
+                        except ValueError:
+                            break
+            if kept:
+                savefile.atomic_write(self.path, b"".join(kept))
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+        self.snapshot_seq = seq
+
+    def wait(self):
+        """Wait for a background compaction to finish."""
+        autosave.service.wait(self.snapshot_key())
+
+    def close(self):
+        """Finish background work. Events not flushed yet are dropped."""
+        self.discard()
+        self.wait()
+
+
+# ---------------------------------------------------
+# Following a log from the command line
+# ---------------------------------------------------
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Print the events in a game's event log.")
+    parser.add_argument("path", help="a savegame .events file")
+    parser.add_argument("--follow", action="store_true", help="keep printing events as they're logged")
+    args = parser.parse_args()
+
+    events = follow_log(args.path) if args.follow else read_log(args.path)
+    try:
+        for seq, event in events:
+            print(json.dumps({"seq": seq, "type": type(event).__name__, **event.as_dict()}), flush=True)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
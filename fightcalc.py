@@ -0,0 +1,215 @@
+"""
+Closed-form fight calculator.
+
+With the always-attack strategy a fight is fully decided by the player's
+HP and damage, the weapon's bonus and durability, the monster's HP and
+damage, and whether the player carries a Monster Charm. resolve_fights
+works the result out directly for whole NumPy arrays of those values,
+and matches combat.resolve_fight turn for turn. To check that it still
+does after changing either one:
+
+    python fightcalc.py [--fights 20000] [--seed 0]
+"""
+
+import random
+import sys
+
+import numpy as np
+
+import combat
+from combat import find_charm
+from content import TABLES
+
+WON = 0
+DIED = 1
+OUTCOME_NAMES = ["won", "died"]
+
+
+def ceil_div(a, b):
+    return -(-a // b)
+
+
+def player_stats(player):
+    """Pull the numbers resolve_fights needs out of a player dict."""
+    weapon = player["equipped_weapon"]
+    charm = find_charm(player["inventory"]) is not None
+    return {
+        "player_hp": player["hp"],
+        "player_damage": player["damage"],
+        "weapon_bonus": weapon["damage_bonus"] if weapon else 0,
+        "durability": weapon["currentDurability"] if weapon else 0,
+        "has_weapon": weapon is not None,
+        "charm": charm
+    }
+
+
+def resolve_fights(player_hp, player_damage, monster_hp, monster_damage,
+                   weapon_bonus=0, durability=0, has_weapon=None, charm=False, gold=0):
+    """
+    Work out fights without playing them turn by turn.
+
+    Every argument may be a scalar or an array; they are broadcast
+    together, so one call can cover a whole table of monsters.
+
+    Parameters:
+        player_hp, player_damage: The player's HP and base damage.
+        monster_hp, monster_damage: The monster's HP and damage.
+        weapon_bonus, durability: Equipped weapon's damage bonus and current durability.
+        has_weapon: Whether a weapon is equipped (default: durability > 0 or bonus > 0).
+        charm: Whether the player carries a Monster Charm.
+        gold: Gold the monster drops when beaten.
+
+    Returns:
+        dict of arrays with the same keys as combat.resolve_fight, plus
+        player_hp (HP left afterwards). "outcome" holds WON or DIED.
+    """
+    player_hp, player_damage, monster_hp, monster_damage, weapon_bonus, durability, charm, gold = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.int64) for v in
+          (player_hp, player_damage, monster_hp, monster_damage, weapon_bonus, durability, charm, gold)))
+    if has_weapon is None:
+        has_weapon = (durability > 0) | (weapon_bonus > 0)
+    has_weapon = np.broadcast_to(np.asarray(has_weapon, dtype=bool), player_hp.shape)
+    charm = charm.astype(bool)
+
+    # A weapon always lasts at least one swing: it is used, then checked
+    uses = np.where(has_weapon, np.maximum(durability, 1), 0)
+    bonus = np.where(has_weapon, weapon_bonus, 0)
+    armed_hit = player_damage + bonus
+    armed_total = uses * armed_hit
+
+    # Attacks needed to bring the monster to 0 HP (huge if it can't be hurt)
+    big = np.iinfo(np.int64).max // 4
+    safe_armed = np.where(armed_hit > 0, armed_hit, 1)
+    safe_base = np.where(player_damage > 0, player_damage, 1)
+    kill_while_armed = ceil_div(monster_hp, safe_armed)
+    kill_after_break = uses + ceil_div(monster_hp - armed_total, safe_base)
+    to_kill = np.where((armed_hit > 0) & (armed_total >= monster_hp), kill_while_armed,
+                       np.where(player_damage > 0, kill_after_break, big))
+    to_kill = np.maximum(to_kill, 1)
+
+    # Monster hits needed to bring the player to 0 HP
+    safe_monster = np.where(monster_damage > 0, monster_damage, 1)
+    to_die = np.where(monster_damage > 0, ceil_div(player_hp, safe_monster), big)
+
+    # The monster only strikes back after an attack that doesn't kill it
+    died = to_die < to_kill
+    turns = np.where(died, to_die, to_kill)
+    hits_taken = np.where(died, to_die, to_kill - 1)
+
+    armed_swings = np.minimum(turns, uses)
+    dealt = armed_swings * armed_hit + (turns - armed_swings) * player_damage
+
+    result = {
+        "outcome": np.where(died, DIED, WON),
+        "turns": turns,
+        "damage_dealt": dealt,
+        "damage_taken": hits_taken * monster_damage,
+        "durability_used": armed_swings,
+        "charm_used": np.zeros(turns.shape, dtype=bool),
+        "weapon_broke": has_weapon & (turns >= uses),
+        "gold_gained": np.where(died, 0, gold)
+    }
+
+    # The charm ends the fight on the first turn before anyone swings
+    result["outcome"] = np.where(charm, WON, result["outcome"])
+    result["turns"] = np.where(charm, 1, result["turns"])
+    for key in ("damage_dealt", "damage_taken", "durability_used"):
+        result[key] = np.where(charm, 0, result[key])
+    result["charm_used"] = charm.copy()
+    result["weapon_broke"] &= ~charm
+    result["gold_gained"] = np.where(charm, gold, result["gold_gained"])
+
+    # Fights that are over before they start: the loop never runs
+    no_fight = (player_hp <= 0) | (monster_hp <= 0)
+    for key in ("turns", "damage_dealt", "damage_taken", "durability_used"):
+        result[key] = np.where(no_fight, 0, result[key])
+    result["charm_used"] &= ~no_fight
+    result["weapon_broke"] &= ~no_fight
+    result["outcome"] = np.where(no_fight, np.where(player_hp <= 0, DIED, WON), result["outcome"])
+    result["gold_gained"] = np.where(result["outcome"] == WON, gold, 0)
+
+    result["player_hp"] = player_hp - result["damage_taken"]
+    return result
+
+
+def outcome_table(player, hp_range=TABLES.encounter_hp, damage_range=TABLES.encounter_damage):
+    """
+    Resolve a fight against every monster random_monster can produce.
+
+    Returns a dict of 2D arrays indexed [hp - hp_range[0], damage - damage_range[0]].
+    """
+    hp = np.arange(hp_range[0], hp_range[1] + 1)[:, None]
+    damage = np.arange(damage_range[0], damage_range[1] + 1)[None, :]
+    return resolve_fights(monster_hp=hp, monster_damage=damage, **player_stats(player))
+
+
+# ---------------------------------------------------
+# Checking against combat.resolve_fight
+# ---------------------------------------------------
+RESULT_KEYS = ("turns", "damage_dealt", "damage_taken", "durability_used", "charm_used", "weapon_broke", "gold_gained")
+
+
+def random_fight(rng):
+    """Return (player, monster) for a random fight, edge cases (no HP, broken weapon) included."""
+    from gamefunctions import create_player
+    player = create_player()
+    player["hp"] = rng.randint(-2, 40)
+    player["damage"] = rng.randint(0, 8)
+    if rng.random() < 0.6:
+        weapon = {"name": "Sword", "type": "weapon", "damage_bonus": rng.randint(0, 6),
+                  "maxDurability": 10, "currentDurability": rng.randint(-1, 12)}
+        player["inventory"].append(weapon)
+        player["equipped_weapon"] = weapon
+    if rng.random() < 0.2:
+        player["inventory"].append({"name": "Monster Charm", "type": "special", "effect": "auto_kill"})
+    monster = {"name": "Check", "hp": rng.randint(-1, 25), "damage": rng.randint(0, 8), "gold": rng.randint(5, 20)}
+    return player, monster
+
+
+def compare_with_combat(fights=20_000, seed=0):
+    """
+    Play seeded random fights both ways and return the ones that differ.
+
+    Fights where neither side does damage once the weapon is gone (and
+    there's no charm) may never end in combat.resolve_fight, so they're
+    skipped.
+
+    Returns:
+        list: (player stats, monster, key, resolve_fights value, resolve_fight value) per mismatch.
+    """
+    rng = random.Random(seed)
+    mismatches = []
+    for _ in range(fights):
+        player, monster = random_fight(rng)
+        stats = player_stats(player)
+        if player["hp"] > 0 and monster["hp"] > 0 and monster["damage"] == 0 == player["damage"] and not stats["charm"]:
+            continue
+        calculated = resolve_fights(monster_hp=monster["hp"], monster_damage=monster["damage"],
+                                    gold=monster["gold"], **stats)
+        played = combat.resolve_fight(player, monster)
+        if OUTCOME_NAMES[int(calculated["outcome"])] != played["outcome"]:
+            mismatches.append((stats, monster, "outcome", OUTCOME_NAMES[int(calculated["outcome"])], played["outcome"]))
+            continue
+        for key in RESULT_KEYS:
+            if int(calculated[key]) != int(played[key]):
+                mismatches.append((stats, monster, key, int(calculated[key]), played[key]))
+                break
+    return mismatches
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Check resolve_fights against combat.resolve_fight.")
+    parser.add_argument("--fights", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mismatches = compare_with_combat(args.fights, args.seed)
+    for stats, monster, key, calculated, played in mismatches[:20]:
+        print(f"{key}: resolve_fights {calculated!r}, resolve_fight {played!r}  {stats} vs {monster}")
+    print(f"{args.fights:,} fights, {len(mismatches)} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,12 @@ Main game file for the Adventure Game.
 This version includes saving and loading your game using JSON.
 """
 
-import random
-import json
-import os
+import combat
+import gameinput
 import gamefunctions
+from content import TABLES
+from events import emit, WeaponEquipped
+from inventory import Inventory
 
 
 # ---------------------------------------------------
@@ -19,95 +21,35 @@ def create_player():
         "hp": 30,
         "gold": 10,
         "damage": 5,
-        "inventory": [],
+        "inventory": Inventory(),
         "equipped_weapon": None
     }
 
 
 # ---------------------------------------------------
-# SAVE GAME
+# SAVE GAME / LOAD GAME
 # ---------------------------------------------------
-def save_game(player, filename="savegame.json"):
-    data = {
-        "name": player["name"],
-        "hp": player["hp"],
-        "gold": player["gold"],
-        "damage": player["damage"],
-        "inventory": player["inventory"],
-        "equipped_weapon": (
-            player["equipped_weapon"]["name"]
-            if player["equipped_weapon"] else None
-        )
-    }
+# Both go through the save container in gamefunctions, which also reads an old savegame.json
+def save_game(player, filename=gamefunctions.SAVE_FILE):
+    gamefunctions.save_game(player, filename)
 
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=4)
 
-    print(f"\nGame saved to {filename}!\n")
-
-
-# ---------------------------------------------------
-# LOAD GAME
-# ---------------------------------------------------
-def load_game(filename="savegame.json"):
-    if not os.path.exists(filename):
-        print("No save file found.")
-        return None
-
-    with open(filename, "r") as f:
-        data = json.load(f)
-
-    print("\nSave file loaded!")
-
-    # Fix equipped weapon reference
-    weapon_name = data["equipped_weapon"]
-    data["equipped_weapon"] = None
-
-    if weapon_name:
-        for item in data["inventory"]:
-            if item["name"] == weapon_name:
-                data["equipped_weapon"] = item
-                break
-
-    return data
+def load_game(filename=gamefunctions.SAVE_FILE):
+    return gamefunctions.load_game(filename)
 
 
 # ---------------------------------------------------
 # Shop functionality
 # ---------------------------------------------------
 def shop(player):
-    print("\n=== Game Shop ===")
-    print("1. Sword (50 gold) – Weapon +5 dmg, 10 durability")
-    print("2. Monster Charm (40 gold) – One-use instant kill")
-    print("3. Exit shop")
-
-    choice = input("Choose item: ")
-
-    if choice == "1":
-        if player["gold"] >= 50:
-            player["gold"] -= 50
-            item = {
-                "name": "Sword",
-                "type": "weapon",
-                "damage_bonus": 5,
-                "maxDurability": 10,
-                "currentDurability": 10
-            }
-            player["inventory"].append(item)
-            print("You bought a Sword!")
-        else:
-            print("Not enough gold.")
+    gamefunctions.show_shop_menu()
+
+    choice = gameinput.ask("Choose item: ")
 
-    elif choice == "2":
-        if player["gold"] >= 40:
-            player["gold"] -= 40
-            item = {
-                "name": "Monster Charm",
-                "type": "special",
-                "effect": "auto_kill"
-            }
-            player["inventory"].append(item)
-            print("You bought a Monster Charm!")
+    if choice in TABLES.shop_by_key:
+        item = gamefunctions.buy_item(player, choice)
+        if item:
+            print(f"You bought a {item['name']}!")
         else:
             print("Not enough gold.")
 
@@ -136,7 +78,7 @@ def show_inventory(player):
     print("\nE. Equip a weapon")
     print("X. Exit inventory")
 
-    choice = input("Choose an option: ")
+    choice = gameinput.ask("Choose an option: ")
 
     if choice.lower() == "e":
         equip_weapon(player)
@@ -150,7 +92,7 @@ def show_inventory(player):
 def equip_weapon(player):
     print("\n=== Equip Weapon ===")
 
-    weapons = [item for item in player["inventory"] if item["type"] == "weapon"]
+    weapons = player["inventory"].of_type("weapon")
 
     if not weapons:
         print("No weapons in inventory.")
@@ -160,9 +102,9 @@ def equip_weapon(player):
         print(f"{i}. {weapon['name']} (+{weapon['damage_bonus']} dmg)")
 
     try:
-        idx = int(input("Choose weapon number: "))
+        idx = int(gameinput.ask("Choose weapon number: "))
         if 1 <= idx <= len(weapons):
-            player["equipped_weapon"] = weapons[idx - 1]
+            emit(player, WeaponEquipped(player["inventory"].position(weapons[idx - 1])))
             print(f"You equipped {weapons[idx - 1]['name']}!")
         else:
             print("Invalid choice.")
@@ -175,141 +117,40 @@ def equip_weapon(player):
 # ---------------------------------------------------
 def fight_monster(player):
     monster = gamefunctions.random_monster()
-    mhp = monster["hp"]
-    mdmg = monster["damage"]
 
     print(f"\nA {monster['name']} appears!")
-    print(f"HP: {mhp} | Damage: {mdmg}")
-
-    while mhp > 0 and player["hp"] > 0:
-        print(f"\nYour HP: {player['hp']}")
-        action = input("(A)ttack, (R)un: ").lower()
-
-        if action == "r":
-            print("You ran away!")
-            return
-
-        # Check auto-kill item
-        for item in player["inventory"]:
-            if item["type"] == "special" and item["effect"] == "auto_kill":
-                print("Your Monster Charm activates! The monster dies instantly!")
-                player["inventory"].remove(item)
-                mhp = 0
-                break
-
-        if mhp <= 0:
-            break
-
-        # Player attack
-        dmg = player["damage"]
-        if player["equipped_weapon"]:
-            dmg += player["equipped_weapon"]["damage_bonus"]
-            player["equipped_weapon"]["currentDurability"] -= 1
-
-            # Weapon breaks
-            if player["equipped_weapon"]["currentDurability"] <= 0:
-                print(f"Your {player['equipped_weapon']['name']} broke!")
-                player["inventory"].remove(player["equipped_weapon"])
-                player["equipped_weapon"] = None
-
-        mhp -= dmg
-        print(f"You hit the {monster['name']} for {dmg} damage!")
-
-        if mhp <= 0:
-            break
-
-        # Monster attacks back
-        player["hp"] -= mdmg
-        print(f"The monster hits you for {mdmg} damage!")
-
-    if player["hp"] <= 0:
+    print(f"HP: {monster['hp']} | Damage: {monster['damage']}")
+
+    # Combat rules live in combat.resolve_fight; this just asks and prints
+    result = combat.resolve_fight(
+        player, monster, gamefunctions.ask_attack_or_run,
+        gamefunctions.fight_reporter(player, monster["name"], "The monster")
+    )
+
+    if result["outcome"] == "ran":
+        print("You ran away!")
+        return
+
+    if result["outcome"] == "died":
         print("\nYou died!")
         exit()
 
-    gold_gain = random.randint(5, 20)
-    player["gold"] += gold_gain
-    print(f"\nYou defeated the monster and earned {gold_gain} gold!")
+    print(f"\nYou defeated the monster and earned {result['gold_gained']} gold!")
 
 
 # ---------------------------------------------------
 # Rest
 # ---------------------------------------------------
 def rest(player):
-    print("You take a rest... +10 HP")
-    player["hp"] += 10
+    gamefunctions.rest(player)
 
 
 # ---------------------------------------------------
 # Main game loop
 # ---------------------------------------------------
 def main():
-    print("=== Adventure Game ===")
-
-    # ---------------------------
-    # Load or New Game
-    # ---------------------------
-    print("1. New Game")
-    print("2. Load Game")
-    start_choice = input("> ")
-
-    if start_choice == "2":
-        player = gamefunctions.load_game()
-        if player:
-            print(f"Welcome back, {player['name']}!")
-        else:
-            print("No save file found. Starting a new game instead.")
-            player = gamefunctions.create_player()
-            player["name"] = input("Enter your name: ")
-    else:
-        player = gamefunctions.create_player()
-        player["name"] = input("Enter your name: ")
-
-    # ---------------------------
-    # Load map state
-    # ---------------------------
-    map_state = gamefunctions.load_map_state()
-
-    # ---------------------------
-    # Main Town Menu Loop
-    # ---------------------------
-    while True:
-        print("\n=== Town Menu ===")
-        print("1. Leave town (Explore Map)")
-        print("2. Fight a monster directly")
-        print("3. Rest")
-        print("4. Shop")
-        print("5. Inventory")
-        print("6. Save and Quit")
-
-        choice = input("> ")
-
-        if choice == "1":
-            # Run the map and get the returned action
-            action, map_state = gamefunctions.run_map(map_state)
-
-            if action == "monster":
-                gamefunctions.fight_monster(player)
-            elif action == "town":
-                print("You returned to town.")
-            elif action == "quit":
-                print("Game exited abruptly.")
-                break
-
-        elif choice == "2":
-            gamefunctions.fight_monster(player)
-        elif choice == "3":
-            gamefunctions.rest(player)
-        elif choice == "4":
-            gamefunctions.shop(player)
-        elif choice == "5":
-            gamefunctions.show_inventory(player)
-        elif choice == "6":
-            gamefunctions.save_game(player)
-            print("Goodbye!")
-            break
-        else:
-            print("Invalid option.")
-
+    # One game loop for everyone (this file, the server, replays); it lives in gamefunctions
+    gamefunctions.main()
 
 
 if __name__ == "__main__":
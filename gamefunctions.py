@@ -5,28 +5,35 @@ This version includes saving and loading your game using JSON,
 plus wandering monsters, a map, inventory, shop, and combat.
 """
 
-import random
-import json
+import contextvars
+import copy
 import os
-import pygame
-from wanderingMonster import WanderingMonster
-
-class NPC:
-    def __init__(self, name, position, dialogue, item=None):
-        self.name = name
-        self.position = position  # (x, y) tuple
-        self.dialogue = dialogue
-        self.item = item  # Optional item dict
-
-    def interact(self, player):
-        print(f"\n{self.name} says: '{self.dialogue}'")
-        if self.item:
-            print(f"{self.name} gives you a {self.item['name']}!")
-            player['inventory'].append(self.item)
-            self.item = None  # Remove item after giving
+import autosave
+import events
+import gameinput
+import rng
+import savefile
+from combat import resolve_fight
+from content import TABLES
+from events import emit, GoldChanged, HpChanged, ItemAdded, WeaponEquipped
+from inventory import Inventory
+
+# Player, map, monsters and NPCs all live in one sectioned save file
+SAVE_FILE = "savegame.sav"
+
+# Map chunks far from the player are kept here instead of in memory
+WORLD_DIR = "savegame.chunks"
+
+# Older versions used two files; these are still read if there's no container yet
+LEGACY_SAVE_FILE = "savegame.json"
+MAP_FILE = "map_state.json"
 
+# Folder the save files above live in. The server gives each session its own.
+save_dir = contextvars.ContextVar("save_dir", default="")
 
-MAP_FILE = "map_state.json"
+def save_path(filename):
+    """Return where a save file lives for the current session."""
+    return os.path.join(save_dir.get(), filename)
 
 # ---------------------------------------------------
 # Player management
@@ -37,120 +44,185 @@ def create_player():
         "hp": 30,
         "gold": 10,
         "damage": 5,
-        "inventory": [],
+        "inventory": Inventory(),
         "equipped_weapon": None
     }
 
 # ---------------------------------------------------
 # Save and Load Game
 # ---------------------------------------------------
-def save_game(player, filename="savegame.json"):
-    data = {
+def player_save_data(player):
+    """Return the player as it is written to disk (the weapon is stored by name and inventory index)."""
+    inventory = list(player["inventory"])
+    weapon = player["equipped_weapon"]
+    return {
         "name": player["name"],
         "hp": player["hp"],
         "gold": player["gold"],
         "damage": player["damage"],
-        "inventory": player["inventory"],
-        "equipped_weapon": (
-            player["equipped_weapon"]["name"]
-            if player["equipped_weapon"] else None
+        "inventory": inventory,
+        "equipped_weapon": weapon["name"] if weapon else None,
+        # Which of several same-named weapons it is; saves without it fall back to the first one
+        "equipped_index": (
+            next(index for index, item in enumerate(inventory) if item is weapon)
+            if weapon else None
         )
     }
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=4)
+
+def player_log(filename=SAVE_FILE, fmt="json"):
+    """Event log for the player section of the save container."""
+    return events.EventLog(save_path(filename), fmt)
+
+def snapshot_player(log, player, background=False):
+    """Fold the events logged so far into a fresh snapshot of the player."""
+    # Events after the snapshot count item positions from the snapshot's order,
+    # unless they go to some other log than this one
+    if events.current_log.get() in (None, log):
+        player["inventory"].renumber()
+    log.compact(player_save_data(player), background)
+
+def flush_player(log, player, background=False):
+    """
+    Write the player's events logged since the last flush.
+
+    A new game's log doesn't own the save on disk yet, so its first write
+    is a whole snapshot instead. An old save is only replaced once the
+    new game has actually done something.
+    """
+    if log.owned:
+        log.flush(background)
+    elif log.pending:
+        snapshot_player(log, player, background)
+
+def save_game(player, filename=SAVE_FILE, fmt=None):
+    """
+    Write a full snapshot of the player; the events logged so far are folded into it.
+
+    Parameters:
+        player (dict): The player.
+        filename (str): The save container.
+        fmt (str, optional): "json" or "binary". None keeps the running game's format (JSON for a new save).
+    """
+    log = events.current_log.get()
+    if log is None or log.filename != os.path.abspath(save_path(filename)):
+        log = player_log(filename, fmt or "json")
+    elif fmt is not None:
+        # The session's later snapshots are written in the new format too
+        log.fmt = fmt
+    snapshot_player(log, player)
     print(f"\nGame saved to {filename}!\n")
 
-def load_game(filename="savegame.json"):
-    if not os.path.exists(filename):
+def load_game(filename=SAVE_FILE, log=None):
+    """
+    Load the player: the last snapshot, then every event logged after it.
+
+    Parameters:
+        filename (str): The save container.
+        log (EventLog, optional): Log to read; pass the one the game will keep appending to.
+    """
+    log = log or player_log(filename)
+    data, replay = log.load()
+    if data is None and os.path.exists(save_path(LEGACY_SAVE_FILE)):
+        # Move an old savegame.json into the container
+        data = savefile.load_snapshot(save_path(LEGACY_SAVE_FILE))
+        log.compact(data)
+    if data is None:
         print("No save file found.")
         return None
 
-    with open(filename, "r") as f:
-        data = json.load(f)
+    data["inventory"] = Inventory(data["inventory"])
 
     weapon_name = data["equipped_weapon"]
+    weapon_index = data.pop("equipped_index", None)
     data["equipped_weapon"] = None
 
     if weapon_name:
-        for item in data["inventory"]:
-            if item["name"] == weapon_name:
-                data["equipped_weapon"] = item
-                break
+        inventory = data["inventory"]
+        if weapon_index is not None and weapon_index < len(inventory) and inventory[weapon_index]["name"] == weapon_name:
+            data["equipped_weapon"] = inventory[weapon_index]
+        else:
+            data["equipped_weapon"] = inventory.first(type="weapon", name=weapon_name)
 
+    for event in replay:
+        event.apply(data)
     return data
 
 # ---------------------------------------------------
 # Map state persistence
 # ---------------------------------------------------
-def load_map_state():
-    if os.path.exists(MAP_FILE):
-        with open(MAP_FILE, "r") as f:
-            return json.load(f)
+def map_save_key(filename):
+    return os.path.abspath(save_path(filename)) + " map"
+
+def load_map_state(filename=SAVE_FILE):
+    # An autosave of the map, or a snapshot of the player, may still be on its way to disk
+    autosave.service.wait(map_save_key(filename))
+    player_log(filename).wait()
+    container = savefile.SaveContainer(save_path(filename))
+    if container.has("map"):
+        state = dict(container.get("map"))
+        state["monsters"] = container.get("monsters", [])
+        state["npcs"] = container.get("npcs", [])
+        return state
+    elif os.path.exists(save_path(MAP_FILE)):
+        return savefile.load_snapshot(save_path(MAP_FILE))
     else:
         return {"player_pos": [0, 0], "monsters": []}
 
-def save_map_state(state):
-    with open(MAP_FILE, "w") as f:
-        json.dump(state, f)
+def save_map_state(state, filename=SAVE_FILE):
+    container = savefile.SaveContainer(save_path(filename))
+    container.set("map", {key: value for key, value in state.items() if key not in ("monsters", "npcs")})
+    container.set("monsters", state["monsters"])
+    container.set("npcs", state.get("npcs", []))
+    container.save()
+
+def autosave_map_state(state, filename=SAVE_FILE):
+    """Like save_map_state, but written by the autosave thread from a copy of state."""
+    path = os.path.abspath(save_path(filename))
+    autosave.service.submit(map_save_key(filename), save_map_state, copy.deepcopy(state), path)
 
 # ---------------------------------------------------
 # Combat
 # ---------------------------------------------------
 def random_monster():
     return {
-        "name": random.choice(["Goblin", "Orc", "Troll", "Dragon", "Zombie"]),
-        "hp": random.randint(10, 20),
-        "damage": random.randint(2, 7)
+        "name": TABLES.encounter_monsters.pick(rng.stream("encounters")),
+        "hp": rng.stream("encounters").randint(*TABLES.encounter_hp),
+        "damage": rng.stream("encounters").randint(*TABLES.encounter_damage)
     }
 
+def ask_attack_or_run(player, monster, monster_hp):
+    """Combat strategy that asks the player what to do each turn."""
+    print(f"\nYour HP: {player['hp']}")
+    action = gameinput.ask("(A)ttack, (R)un: ").lower()
+    return "run" if action == "r" else "attack"
+
+def fight_reporter(player, monster_name, attacker):
+    """Build a report callback that prints combat events as they happen."""
+    def report(event, amount):
+        if event == "charm":
+            print("Your Monster Charm activates! The monster dies instantly!")
+        elif event == "weapon_broke":
+            print(f"Your {player['equipped_weapon']['name']} broke!")
+        elif event == "hit":
+            print(f"You hit the {monster_name} for {amount} damage!")
+        elif event == "hurt":
+            print(f"{attacker} hits you for {amount} damage!")
+    return report
+
 def fight_monster(player):
     monster = random_monster()
-    mhp = monster["hp"]
-    mdmg = monster["damage"]
-    print(f"\nA {monster['name']} appears! HP: {mhp} | Damage: {mdmg}")
-
-    while mhp > 0 and player["hp"] > 0:
-        print(f"\nYour HP: {player['hp']}")
-        action = input("(A)ttack, (R)un: ").lower()
-        if action == "r":
-            print("You ran away!")
-            return
-
-        for item in player["inventory"]:
-            if item["type"] == "special" and item["effect"] == "auto_kill":
-                print("Your Monster Charm activates! The monster dies instantly!")
-                player["inventory"].remove(item)
-                mhp = 0
-                break
+    print(f"\nA {monster['name']} appears! HP: {monster['hp']} | Damage: {monster['damage']}")
 
-        if mhp <= 0:
-            break
-
-        dmg = player["damage"]
-        if player["equipped_weapon"]:
-            dmg += player["equipped_weapon"]["damage_bonus"]
-            player["equipped_weapon"]["currentDurability"] -= 1
-            if player["equipped_weapon"]["currentDurability"] <= 0:
-                print(f"Your {player['equipped_weapon']['name']} broke!")
-                player["inventory"].remove(player["equipped_weapon"])
-                player["equipped_weapon"] = None
-
-        mhp -= dmg
-        print(f"You hit the {monster['name']} for {dmg} damage!")
-
-        if mhp <= 0:
-            break
-
-        player["hp"] -= mdmg
-        print(f"The monster hits you for {mdmg} damage!")
-
-    if player["hp"] <= 0:
+    result = resolve_fight(player, monster, ask_attack_or_run,
+                           fight_reporter(player, monster["name"], "The monster"))
+    if result["outcome"] == "ran":
+        print("You ran away!")
+        return
+    if result["outcome"] == "died":
         print("\nYou died!")
         exit()
 
-    gold_gain = random.randint(5, 20)
-    player["gold"] += gold_gain
-    print(f"\nYou defeated the monster and earned {gold_gain} gold!")
+    print(f"\nYou defeated the monster and earned {result['gold_gained']} gold!")
 
 # ---------------------------------------------------
 # Inventory and equipment
@@ -170,7 +242,7 @@ def show_inventory(player):
             print(f"{i}. {item['name']}")
 
     print("\nE. Equip a weapon\nX. Exit inventory")
-    choice = input("Choose an option: ")
+    choice = gameinput.ask("Choose an option: ")
     if choice.lower() == "e":
         equip_weapon(player)
     else:
@@ -178,16 +250,16 @@ def show_inventory(player):
 
 def equip_weapon(player):
     print("\n=== Equip Weapon ===")
-    weapons = [item for item in player["inventory"] if item["type"] == "weapon"]
+    weapons = player["inventory"].of_type("weapon")
     if not weapons:
         print("No weapons in inventory.")
         return
     for i, weapon in enumerate(weapons, 1):
         print(f"{i}. {weapon['name']} (+{weapon['damage_bonus']} dmg)")
     try:
-        idx = int(input("Choose weapon number: "))
+        idx = int(gameinput.ask("Choose weapon number: "))
         if 1 <= idx <= len(weapons):
-            player["equipped_weapon"] = weapons[idx - 1]
+            emit(player, WeaponEquipped(player["inventory"].position(weapons[idx - 1])))
             print(f"You equipped {weapons[idx - 1]['name']}!")
         else:
             print("Invalid choice.")
@@ -197,39 +269,36 @@ def equip_weapon(player):
 # ---------------------------------------------------
 # Shop
 # ---------------------------------------------------
-def shop(player):
+def buy_item(player, choice):
+    """
+    Buy a shop item by its menu number ("1" is the Sword, "2" the Monster Charm, ...) without any prompts.
+
+    Returns the item added to the inventory, or None if there's no such item or the player can't afford it.
+    """
+    entry = TABLES.shop_by_key.get(choice)
+    if entry is None or player["gold"] < entry.price:
+        return None
+    emit(player, GoldChanged(-entry.price, "shop"))
+    # Each purchase is its own item; a bought sword wears down on its own
+    item = dict(entry.item)
+    emit(player, ItemAdded(item))
+    return item
+
+def show_shop_menu():
     print("\n=== Game Shop ===")
-    print("1. Sword (50 gold) – Weapon +5 dmg, 10 durability")
-    print("2. Monster Charm (40 gold) – One-use instant kill")
-    print("3. Exit shop")
-
-    choice = input("Choose item: ")
-
-    if choice == "1":
-        if player["gold"] >= 50:
-            player["gold"] -= 50
-            item = {
-                "name": "Sword",
-                "type": "weapon",
-                "damage_bonus": 5,
-                "maxDurability": 10,
-                "currentDurability": 10
-            }
-            player["inventory"].append(item)
-            print("You bought a Sword!")
-        else:
-            print("Not enough gold.")
+    for entry in TABLES.shop:
+        print(f"{entry.key}. {entry.name} ({entry.price} gold) – {entry.description}")
+    print(f"{len(TABLES.shop) + 1}. Exit shop")
+
+def shop(player):
+    show_shop_menu()
+
+    choice = gameinput.ask("Choose item: ")
 
-    elif choice == "2":
-        if player["gold"] >= 40:
-            player["gold"] -= 40
-            item = {
-                "name": "Monster Charm",
-                "type": "special",
-                "effect": "auto_kill"
-            }
-            player["inventory"].append(item)
-            print("You bought a Monster Charm!")
+    if choice in TABLES.shop_by_key:
+        item = buy_item(player, choice)
+        if item:
+            print(f"You bought a {item['name']}!")
         else:
             print("Not enough gold.")
     else:
@@ -238,164 +307,37 @@ def shop(player):
 # ---------------------------------------------------
 # Rest
 # ---------------------------------------------------
+REST_HP = 10
+
 def rest(player):
-    print("You take a rest... +10 HP")
-    player["hp"] += 10
+    print(f"You take a rest... +{REST_HP} HP")
+    emit(player, HpChanged(REST_HP, "rest"))
 
 # ---------------------------------------------------
 # Wandering Monster Combat
 # ---------------------------------------------------
 def fight_wandering_monster(player, monster):
-    print(f"\nA {monster.name} appears! HP: 20 | Damage: 5")
-    monster_hp = 20
-    monster_dmg = 5
-
-    while monster_hp > 0 and player["hp"] > 0:
-        print(f"\nYour HP: {player['hp']}")
-        action = input("(A)ttack, (R)un: ").lower()
-        if action == "r":
-            print("You ran away!")
-            return
-
-        for item in player["inventory"]:
-            if item["type"] == "special" and item["effect"] == "auto_kill":
-                print("Your Monster Charm activates! The monster dies instantly!")
-                player["inventory"].remove(item)
-                monster_hp = 0
-                break
-
-        if monster_hp <= 0:
-            break
-
-        dmg = player["damage"]
-        if player["equipped_weapon"]:
-            dmg += player["equipped_weapon"]["damage_bonus"]
-            player["equipped_weapon"]["currentDurability"] -= 1
-            if player["equipped_weapon"]["currentDurability"] <= 0:
-                print(f"Your {player['equipped_weapon']['name']} broke!")
-                player["inventory"].remove(player["equipped_weapon"])
-                player["equipped_weapon"] = None
+    print(f"\nA {monster.name} appears! HP: {TABLES.wandering_hp} | Damage: {TABLES.wandering_damage}")
+    stats = {"name": monster.name, "hp": TABLES.wandering_hp, "damage": TABLES.wandering_damage, "gold": monster.gold}
 
-        monster_hp -= dmg
-        print(f"You hit the {monster.name} for {dmg} damage!")
-
-        if monster_hp <= 0:
-            break
-
-        player["hp"] -= monster_dmg
-        print(f"The {monster.name} hits you for {monster_dmg} damage!")
-
-    if player["hp"] <= 0:
+    result = resolve_fight(player, stats, ask_attack_or_run,
+                           fight_reporter(player, monster.name, f"The {monster.name}"))
+    if result["outcome"] == "ran":
+        print("You ran away!")
+        return
+    if result["outcome"] == "died":
         print("\nYou died!")
         exit()
 
-    player["gold"] += monster.gold
     print(f"\nYou defeated the {monster.name} and earned {monster.gold} gold!")
 
 # ---------------------------------------------------
 # Run map
 # ---------------------------------------------------
-npcs = [
-    NPC("Old Man", (3, 3), "Beware the forest! Take this potion.", {"name": "Health Potion", "type": "special", "effect": "heal"}),
-    NPC("Merchant", (6, 7), "I sell rare items. Visit my shop!")
-]
 def run_map(state, player):
-    GRID_WIDTH = 10
-    GRID_HEIGHT = 10
-    TILE = 32
-    TOWN_LOC = (0, 0)
-
-    pygame.init()
-    screen = pygame.display.set_mode((GRID_WIDTH * TILE, GRID_HEIGHT * TILE))
-    clock = pygame.time.Clock()
-    running = True
-
-    px, py = state["player_pos"]
-    player_move_count = 0
-
-    # Load monsters
-    monsters = []
-    if state.get("monsters"):
-        for m in state["monsters"]:
-            mon = WanderingMonster(GRID_WIDTH, GRID_HEIGHT, TOWN_LOC, m["name"])
-            mon.x, mon.y = m["pos"]
-            monsters.append(mon)
-    else:
-        monsters = WanderingMonster.spawn_monsters(2, GRID_WIDTH, GRID_HEIGHT, TOWN_LOC)
-
-    action = None
-
-    while running:
-        screen.fill((0, 0, 0))
-        for x in range(GRID_WIDTH):
-            for y in range(GRID_HEIGHT):
-                pygame.draw.rect(screen, (50, 50, 50), (x * TILE, y * TILE, TILE, TILE), 1)
-
-        pygame.draw.circle(screen, (0, 255, 0), (TOWN_LOC[0] * TILE + TILE // 2, TOWN_LOC[1] * TILE + TILE // 2), TILE // 2 - 2)
-
-        for mon in monsters:
-            pygame.draw.circle(screen, mon.color, (mon.x * TILE + TILE // 2, mon.y * TILE + TILE // 2), TILE // 2 - 2)
-
-        for npc in npcs:
-            pygame.draw.rect(screen, (255, 255, 0), (npc.position[0]*TILE, npc.position[1]*TILE, TILE, TILE))
-
-        pygame.draw.rect(screen, (0, 0, 255), (px, py, TILE, TILE))
-        pygame.display.flip()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                action = "quit"
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                moved = False
-                if event.key == pygame.K_UP and py > 0:
-                    py -= TILE
-                    moved = True
-                elif event.key == pygame.K_DOWN and py < (GRID_HEIGHT - 1) * TILE:
-                    py += TILE
-                    moved = True
-                elif event.key == pygame.K_LEFT and px > 0:
-                    px -= TILE
-                    moved = True
-                elif event.key == pygame.K_RIGHT and py < (GRID_WIDTH - 1) * TILE:
-                    px += TILE
-                    moved = True
-
-                if moved:
-                    player_move_count += 1
-                    if player_move_count % 2 == 0:
-                        for mon in monsters:
-                            mon.move()
-
-                player_tile = (px // TILE, py // TILE)
-
-                # Check for NPC interaction
-                for npc in npcs:
-                    if player_tile == npc.position:
-                        npc.interact(player)
-
-                # Check if player returned to town
-                if player_tile == TOWN_LOC:
-                    action = "town"
-                    running = False
-                else:
-                    # Check for monsters
-                    for mon in monsters[:]:
-                        if player_tile == mon.position():
-                            fight_wandering_monster(player, mon)
-                            monsters.remove(mon)
-
-        # Respawn monsters if none left
-        if not monsters:
-            monsters = WanderingMonster.spawn_monsters(2, GRID_WIDTH, GRID_HEIGHT, TOWN_LOC)
-
-        clock.tick(10)
-
-    pygame.quit()
-    state["player_pos"] = [px // TILE, py // TILE]
-    state["monsters"] = [{"name": m.name, "pos": m.position()} for m in monsters]
-    save_map_state(state)
-    return action, state
+    # The map needs pygame, which is slow to import; text-only sessions never pay for it
+    import gamemap
+    return gamemap.run_map(state, player)
 
 
 
@@ -407,21 +349,34 @@ def main():
 
     print("1. New Game")
     print("2. Load Game")
-    start_choice = input("> ")
+    start_choice = gameinput.ask("> ")
 
+    log = player_log()
+    player = None
     if start_choice == "2":
-        player = load_game()
+        player = load_game(log=log)
         if player:
             print(f"Welcome back, {player['name']}!")
         else:
             print("No save file found. Starting a new game instead.")
-            player = create_player()
-            player["name"] = input("Enter your name: ")
-    else:
+    if player is None:
         player = create_player()
-        player["name"] = input("Enter your name: ")
+        player["name"] = gameinput.ask("Enter your name: ")
 
-    map_state = load_map_state()
+    # Every change to the player is logged as an event while the game runs
+    token = events.current_log.set(log)
+    try:
+        town(player, log)
+    finally:
+        events.current_log.reset(token)
+        log.close()
+        # Saves still being written finish before the game counts as over
+        autosave.service.flush()
+
+def town(player, log):
+    """Run the town menu until the player quits. Each finished action is written to the log in one go."""
+    # The map is only read from disk the first time the player leaves town
+    map_state = None
 
     while True:
         print("\n=== Town Menu ===")
@@ -432,9 +387,11 @@ def main():
         print("5. Inventory")
         print("6. Save and Quit")
 
-        choice = input("> ")
+        choice = gameinput.ask("> ")
 
         if choice == "1":
+            if map_state is None:
+                map_state = load_map_state()
             action, map_state = run_map(map_state, player)
             if action == "town":
                 print("You returned to town.")
@@ -457,6 +414,13 @@ def main():
         else:
             print("Invalid option.")
 
+        flush_player(log, player)
+        if log.due():
+            # Fold the log into a new snapshot without holding up the game
+            snapshot_player(log, player, background=True)
+
+    flush_player(log, player)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,58 @@
+"""
+Where the game's input comes from.
+
+All prompts go through ask() and the map reads its events and
+simulation ticks through map_frame(), so the player at the keyboard can be swapped for a
+recorded session (see replay.py) or a network client (see server.py)
+without touching the game code.
+"""
+
+import contextvars
+
+
+class LiveInput:
+    """Input from the terminal and the pygame window."""
+    renders = True
+
+    def ask(self, prompt=""):
+        return input(prompt)
+
+    def map_frame(self, timestep):
+        import pygame
+        elapsed = timestep.wait_frame()
+        return pygame.event.get(), timestep.advance(elapsed)
+
+
+# The input source the game is currently reading from
+source = LiveInput()
+
+# Set by the server so each session's thread reads from its own client
+session_source = contextvars.ContextVar("session_source", default=None)
+
+
+def current():
+    """Return the input source for the session running this code."""
+    return session_source.get() or source
+
+
+def ask(prompt=""):
+    """Prompt for a line of text."""
+    return current().ask(prompt)
+
+
+def map_frame(timestep):
+    """
+    Wait for the map's next frame.
+
+    Parameters:
+        timestep (FixedTimestep): The map's simulation clock.
+
+    Returns:
+        tuple: (every pygame event queued since the last frame, simulation ticks due).
+    """
+    return current().map_frame(timestep)
+
+
+def renders():
+    """False when nobody is watching (e.g. a replay), so the map can skip drawing."""
+    return current().renders
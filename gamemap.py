@@ -0,0 +1,215 @@
+"""
+The explorable map for the Adventure Game.
+
+This is the only part of the game that needs pygame, so gamefunctions
+imports it the first time the player leaves town.
+"""
+
+import time
+import pygame
+import autosave
+import gamefunctions
+import gameinput
+import mapdisplay
+from wanderingMonster import WanderingMonster, SIGHT_RANGE
+from npc import NPC
+from content import TABLES
+from events import current_log
+from maprender import MapRenderer
+from profiling import profiler, TRACE_FILE
+from timestep import FixedTimestep
+from occupancy import OccupancyGrid
+from pathfinding import DistanceField
+from world import ChunkedWorld
+
+
+# Size of the world, in tiles. A saved map keeps the size it was made with.
+WORLD_WIDTH = 10
+WORLD_HEIGHT = 10
+
+# How much of the world the window shows at once
+VIEW_WIDTH = 10
+VIEW_HEIGHT = 10
+
+TILE = 32
+TOWN_LOC = (0, 0)
+CHUNK_SIZE = 16
+MONSTERS_PER_CHUNK = 2
+
+# Monsters take a step every simulation tick; frames are drawn (and input read) up to FRAME_RATE times a second
+TICK_RATE = 2
+FRAME_RATE = 60
+
+
+def run_map(state, player):
+    world_width, world_height = state.get("world_size", [WORLD_WIDTH, WORLD_HEIGHT])
+    view_width = min(VIEW_WIDTH, world_width)
+    view_height = min(VIEW_HEIGHT, world_height)
+    # Each visit gets its own NPCs; what they still have to give is kept in the map state
+    npcs = [NPC(spec.name, spec.position, spec.dialogue, dict(spec.item) if spec.item else None)
+            for spec in TABLES.npcs]
+
+    # pygame stays initialised between visits; this just shows the window again.
+    # Nothing is shown when nobody is watching (a replay or a server session).
+    rendering = gameinput.renders()
+    screen = mapdisplay.session.open((view_width * TILE, view_height * TILE)) if rendering else None
+    running = True
+
+    px, py = state["player_pos"]
+
+    # Everything standing on the map is indexed by tile
+    occupancy = OccupancyGrid()
+    for npc in npcs:
+        occupancy.add(npc, npc.position)
+
+    # Monsters live in chunks that are loaded around the player and stored on disk. Only those
+    # that could be on screen (the camera stops at the edges, so up to a view away) or could
+    # see the player are stepped every tick; the rest catch up when the player comes near.
+    near_radius = max(view_width, view_height, SIGHT_RANGE + 1)
+    world = ChunkedWorld(world_width, world_height, TOWN_LOC, gamefunctions.save_path(gamefunctions.WORLD_DIR),
+                         occupancy, CHUNK_SIZE, MONSTERS_PER_CHUNK,
+                         near_radius=near_radius, tick=state.get("world_tick", 0))
+
+    # Maps saved before the world was chunked keep their monsters in the map state
+    for m in state.get("monsters", []):
+        world.add(m)
+    state["monsters"] = []
+    world.activate((px, py))
+
+    # Monsters path around the town and NPCs. One distance field from the player,
+    # rebuilt when they move, steers every monster that chases or flees.
+    blocked = {TOWN_LOC} | {tuple(npc.position) for npc in npcs}
+
+    def player_field():
+        return DistanceField([(px, py)], world.near_bounds(), blocked)
+
+    field = player_field()
+
+    # Restore what each NPC still has to give
+    saved_items = {n["name"]: n["item"] for n in state.get("npcs", [])}
+    for npc in npcs:
+        if npc.name in saved_items:
+            npc.item = saved_items[npc.name]
+
+    action = None
+
+    # Grid, town and NPCs never move, so they are drawn once per camera position
+    renderer = MapRenderer(view_width, view_height, TILE, TOWN_LOC, npcs)
+
+    # Monsters move on a fixed clock; frames in between slide them from where they were
+    timestep = FixedTimestep(TICK_RATE, FRAME_RATE)
+    previous = {}
+
+    # Each visit keeps its own autosave clock; a server runs many maps at once
+    next_autosave = time.monotonic() + autosave.AUTOSAVE_INTERVAL
+
+    def save_progress():
+        # Only cheap copies are made here; the autosave thread encodes and writes them
+        world.save()
+        state["player_pos"] = [px, py]
+        state["world_size"] = [world_width, world_height]
+        state["world_tick"] = world.tick
+        state["npcs"] = [{"name": npc.name, "item": npc.item} for npc in npcs]
+        gamefunctions.autosave_map_state(state)
+        log = current_log.get()
+        if log is not None:
+            gamefunctions.flush_player(log, player, background=True)
+
+    def fight_monsters_at(tile):
+        with profiler.phase("fights"):
+            for mon in occupancy.at(tile):
+                if isinstance(mon, WanderingMonster):
+                    gamefunctions.fight_wandering_monster(player, mon)
+                    world.remove(mon)
+
+    while running:
+        with profiler.phase("wait"):
+            events, ticks = gameinput.map_frame(timestep)
+
+        for event in events:
+            if not running:
+                break
+            if event.type == pygame.QUIT:
+                action = "quit"
+                running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                renderer.invalidate()
+            elif event.type == pygame.KEYDOWN and profiler.enabled and event.key == pygame.K_F3:
+                profiler.toggle_overlay()
+                renderer.invalidate()
+            elif event.type == pygame.KEYDOWN and profiler.enabled and event.key == pygame.K_F4:
+                profiler.toggle_cprofile()
+            elif event.type == pygame.KEYDOWN:
+                moved = False
+                if event.key == pygame.K_UP and py > 0:
+                    py -= 1
+                    moved = True
+                elif event.key == pygame.K_DOWN and py < world_height - 1:
+                    py += 1
+                    moved = True
+                elif event.key == pygame.K_LEFT and px > 0:
+                    px -= 1
+                    moved = True
+                elif event.key == pygame.K_RIGHT and px < world_width - 1:
+                    px += 1
+                    moved = True
+
+                if moved:
+                    with profiler.phase("monsters"):
+                        world.activate((px, py))
+                        field = player_field()
+                    profiler.count("moves")
+
+                player_tile = (px, py)
+
+                # Check for NPC interaction
+                with profiler.phase("npcs"):
+                    for npc in occupancy.at(player_tile):
+                        if isinstance(npc, NPC):
+                            npc.interact(player)
+
+                # Check if player returned to town
+                if player_tile == TOWN_LOC:
+                    action = "town"
+                    running = False
+                else:
+                    fight_monsters_at(player_tile)
+
+        for _ in range(ticks if running else 0):
+            with profiler.phase("monsters"):
+                previous = {mon: (mon.x, mon.y) for mon in world.near_monsters()}
+                world.step(field)
+            profiler.count("ticks")
+            # A monster may have walked onto the player
+            fight_monsters_at((px, py))
+
+        # Respawn monsters if none are left nearby
+        with profiler.phase("respawn"):
+            if not world.active_monsters():
+                world.spawn(world.chunk_of(px, py), MONSTERS_PER_CHUNK)
+
+        # Save now and then while the world is moving, without waiting for the disk
+        if running and ticks and autosave.AUTOSAVE_INTERVAL > 0 and time.monotonic() >= next_autosave:
+            with profiler.phase("autosave"):
+                save_progress()
+            next_autosave = time.monotonic() + autosave.AUTOSAVE_INTERVAL
+
+        if running and rendering:
+            with profiler.phase("draw"):
+                renderer.follow((px, py), world_width, world_height)
+                dirty = renderer.draw(screen, world.active_monsters(), (px, py), previous, timestep.alpha)
+            if profiler.overlay:
+                with profiler.phase("overlay"):
+                    dirty.append(profiler.draw_overlay(screen))
+            if dirty:
+                with profiler.phase("display"):
+                    pygame.display.update(dirty)
+                profiler.count("dirty_rects", len(dirty))
+        profiler.end_frame()
+
+    if rendering:
+        mapdisplay.session.hide()
+    save_progress()
+    if profiler.enabled:
+        profiler.save(TRACE_FILE)
+    return action, state
@@ -0,0 +1,134 @@
+# inventory.py
+
+# Item fields that get an index, so "the first charm" or "all weapons"
+# doesn't mean scanning every item. These never change once an item exists.
+INDEXED_KEYS = ("type", "effect", "name")
+
+
+class Inventory:
+    def __init__(self, items=()):
+        """
+        The player's items, indexed by type, effect and name.
+
+        Items stay plain dicts, in the order they were added, and each gets
+        a stable id for as long as it's held. Adding, removing and looking
+        up an item by type, effect or name are all constant time. Behaves
+        enough like a list (append, remove, iteration, len) that existing
+        code keeps working, and list(inventory) is the save file shape.
+
+        Each item also has a position: the order it was added in, counted
+        from the last renumber(). Removing an item leaves a gap instead of
+        shifting the items after it, so positions stay put and looking one
+        up is constant time too.
+
+        Parameters:
+            items (iterable, optional): Items to start with.
+        """
+        self.items = {}      # item id -> item, in insertion order
+        self.ids = {}        # id(item) -> item id
+        self.indexes = {key: {} for key in INDEXED_KEYS}  # key -> value -> {item id: item}
+        self.slots = []      # position -> item id, None where an item was removed
+        self.positions = {}  # item id -> position
+        self.next_id = 1
+        for item in items:
+            self.append(item)
+
+    def append(self, item):
+        """Add an item and return its id."""
+        item_id = self.next_id
+        self.next_id += 1
+        self.items[item_id] = item
+        self.ids[id(item)] = item_id
+        self.positions[item_id] = len(self.slots)
+        self.slots.append(item_id)
+        for key in INDEXED_KEYS:
+            if key in item:
+                self.indexes[key].setdefault(item[key], {})[item_id] = item
+        return item_id
+
+    add = append
+
+    def remove(self, item):
+        """Remove an item (the same dict that was added)."""
+        try:
+            item_id = self.ids.pop(id(item))
+        except KeyError:
+            raise ValueError("Inventory.remove(item): item not in inventory") from None
+        del self.items[item_id]
+        self.slots[self.positions.pop(item_id)] = None
+        for key in INDEXED_KEYS:
+            if key in item:
+                bucket = self.indexes[key][item[key]]
+                del bucket[item_id]
+                if not bucket:
+                    del self.indexes[key][item[key]]
+
+    def id_of(self, item):
+        """Return the stable id of an item held in this inventory."""
+        return self.ids[id(item)]
+
+    def position(self, item):
+        """Return an item's position (see renumber)."""
+        return self.positions[self.id_of(item)]
+
+    def at(self, position):
+        """Return the item at a position."""
+        item_id = self.slots[position]
+        if item_id is None:
+            raise IndexError(f"Inventory.at({position}): that item was removed")
+        return self.items[item_id]
+
+    def renumber(self):
+        """Close the gaps removed items left, so positions are 0, 1, 2, ... in order again."""
+        self.slots = list(self.items)
+        self.positions = {item_id: position for position, item_id in enumerate(self.slots)}
+
+    def get(self, item_id):
+        """Return the item with this id, or None."""
+        return self.items.get(item_id)
+
+    def first(self, **match):
+        """
+        Return the oldest item matching every given field, or None.
+
+        Example: inventory.first(type="special", effect="auto_kill")
+        """
+        # Walk the smallest index bucket and check the other fields
+        buckets = []
+        for key, value in match.items():
+            bucket = self.indexes[key].get(value)
+            if not bucket:
+                return None
+            buckets.append(bucket)
+        candidates = min(buckets, key=len) if buckets else self.items
+        for item in candidates.values():
+            if all(item.get(key) == value for key, value in match.items()):
+                return item
+        return None
+
+    def of_type(self, item_type):
+        """Return a list of every item of a type, oldest first."""
+        return list(self.indexes["type"].get(item_type, {}).values())
+
+    def __contains__(self, item):
+        return id(item) in self.ids
+
+    def __iter__(self):
+        return iter(list(self.items.values()))
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        if index == -1 and self.items:
+            return next(reversed(self.items.values()))
+        if len(self.slots) == len(self.items) and isinstance(index, int):
+            # No gaps, so a list index is a position
+            return self.items[self.slots[index]]
+        return list(self.items.values())[index]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"Inventory({list(self)!r})"
@@ -0,0 +1,49 @@
+# mapdisplay.py
+import atexit
+import pygame
+
+
+class DisplaySession:
+    def __init__(self):
+        """
+        Keeps one pygame window alive for the whole process.
+
+        pygame is initialised the first time the map opens. Leaving the map
+        hides the window instead of tearing SDL down, so going back out of
+        town just shows it again. pygame shuts down when the process exits.
+        """
+        self.screen = None
+        self.size = None
+
+    def open(self, size, caption="Adventure Game"):
+        """Show the map window at the given size and return its surface."""
+        if not pygame.get_init():
+            pygame.init()
+            atexit.register(self.close)
+
+        if self.screen is None or self.size != size or pygame.display.get_surface() is None:
+            self.screen = pygame.display.set_mode(size)
+            self.size = size
+            pygame.display.set_caption(caption)
+        else:
+            self.screen = pygame.display.set_mode(size, pygame.SHOWN)
+
+        # Anything pressed while the window was hidden isn't meant for the map
+        pygame.event.clear()
+        return self.screen
+
+    def hide(self):
+        """Hide the window until the next open()."""
+        if self.screen is not None and pygame.display.get_init():
+            self.screen = pygame.display.set_mode(self.size, pygame.HIDDEN)
+
+    def close(self):
+        """Shut pygame down. Called automatically at exit."""
+        self.screen = None
+        self.size = None
+        if pygame.get_init():
+            pygame.quit()
+
+
+# The one window the game uses
+session = DisplaySession()
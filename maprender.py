@@ -0,0 +1,147 @@
+# maprender.py
+import pygame
+
+BACKGROUND_COLOR = (0, 0, 0)
+GRID_COLOR = (50, 50, 50)
+TOWN_COLOR = (0, 255, 0)
+NPC_COLOR = (255, 255, 0)
+PLAYER_COLOR = (0, 0, 255)
+
+
+class MapRenderer:
+    def __init__(self, view_width, view_height, tile, town_location, npcs):
+        """
+        Draws the part of the map the camera can see.
+
+        Everything that never moves is kept on a cached surface, which is
+        only rebuilt when the camera moves.
+
+        Parameters:
+            view_width (int): Width of the view in tiles.
+            view_height (int): Height of the view in tiles.
+            tile (int): Size of one tile in pixels.
+            town_location (tuple): Coordinates of the town (x, y).
+            npcs (list): NPCs standing on the map.
+        """
+        self.view_width = view_width
+        self.view_height = view_height
+        self.tile = tile
+        self.town_location = town_location
+        self.npcs = npcs
+        self.camera = (0, 0)  # world tile shown in the top-left corner
+        self.background = self.build_background()
+        self.drawn = set()
+        self.full_redraw = True
+
+    def in_view(self, x, y):
+        cx, cy = self.camera
+        return cx <= x < cx + self.view_width and cy <= y < cy + self.view_height
+
+    def to_screen(self, x, y):
+        """Return the pixel rect of a world tile."""
+        return (round((x - self.camera[0]) * self.tile), round((y - self.camera[1]) * self.tile), self.tile, self.tile)
+
+    def set_camera(self, camera):
+        """Move the camera; the next draw repaints everything."""
+        if camera != self.camera:
+            self.camera = camera
+            self.background = self.build_background()
+            self.invalidate()
+
+    def follow(self, player_tile, world_width, world_height):
+        """Center the camera on the player without showing anything past the world's edge."""
+        x = min(max(player_tile[0] - self.view_width // 2, 0), max(world_width - self.view_width, 0))
+        y = min(max(player_tile[1] - self.view_height // 2, 0), max(world_height - self.view_height, 0))
+        self.set_camera((x, y))
+
+    def build_background(self):
+        """Pre-render the grid, town and NPC tiles in view onto an off-screen surface."""
+        tile = self.tile
+        surface = pygame.Surface((self.view_width * tile, self.view_height * tile))
+        surface.fill(BACKGROUND_COLOR)
+
+        for x in range(self.view_width):
+            for y in range(self.view_height):
+                pygame.draw.rect(surface, GRID_COLOR, (x * tile, y * tile, tile, tile), 1)
+
+        if self.in_view(*self.town_location):
+            x, y, _, _ = self.to_screen(*self.town_location)
+            pygame.draw.circle(surface, TOWN_COLOR, (x + tile // 2, y + tile // 2), tile // 2 - 2)
+
+        for npc in self.npcs:
+            if self.in_view(*npc.position):
+                pygame.draw.rect(surface, NPC_COLOR, self.to_screen(*npc.position))
+
+        # Match the display's pixel format so every blit is a straight copy
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+
+    def invalidate(self):
+        """Force the next draw to repaint the whole window."""
+        self.full_redraw = True
+
+    def sprites(self, monsters, player_tile, previous=None, alpha=1.0):
+        """Return (shape, color, rect) for everything in view that moves, in draw order."""
+        sprites = []
+        for mon in monsters:
+            x, y = mon.x, mon.y
+            if previous and mon in previous:
+                # Slide from the tile it was on before the last tick
+                old_x, old_y = previous[mon]
+                x = old_x + (x - old_x) * alpha
+                y = old_y + (y - old_y) * alpha
+            if self.in_view(x, y):
+                sprites.append(("circle", mon.color, self.to_screen(x, y)))
+        sprites.append(("rect", PLAYER_COLOR, self.to_screen(*player_tile)))
+        return sprites
+
+    def draw_sprite(self, screen, shape, color, rect):
+        if shape == "circle":
+            x, y, w, h = rect
+            pygame.draw.circle(screen, color, (x + w // 2, y + h // 2), w // 2 - 2)
+        else:
+            pygame.draw.rect(screen, color, rect)
+
+    def draw(self, screen, monsters, player_tile, previous=None, alpha=1.0):
+        """
+        Redraw whatever changed since the last call.
+
+        Sprites are compared with the ones drawn last time; only tiles a
+        sprite left or entered get their background restored and repainted.
+
+        Parameters:
+            screen (Surface): The display surface.
+            monsters (list): WanderingMonster instances to draw.
+            player_tile (tuple): Player position in world tiles (x, y).
+            previous (dict, optional): Monster -> tile it stood on before the last simulation tick.
+            alpha (float): How far monsters are drawn between that tile and their current one.
+
+        Returns:
+            list: Rects to pass to pygame.display.update (empty if nothing changed).
+        """
+        sprites = self.sprites(monsters, player_tile, previous, alpha)
+        current = set(sprites)
+
+        if self.full_redraw:
+            self.full_redraw = False
+            screen.blit(self.background, (0, 0))
+            for shape, color, rect in sprites:
+                self.draw_sprite(screen, shape, color, rect)
+            self.drawn = current
+            return [screen.get_rect()]
+
+        changed = current ^ self.drawn
+        self.drawn = current
+        if not changed:
+            return []
+
+        dirty = [pygame.Rect(rect) for rect in {rect for _, _, rect in changed}]
+        for rect in dirty:
+            screen.blit(self.background, rect, rect)
+
+        # Anything overlapping a restored tile has to be painted again
+        for shape, color, rect in sprites:
+            if pygame.Rect(rect).collidelist(dirty) != -1:
+                self.draw_sprite(screen, shape, color, rect)
+        return dirty
@@ -0,0 +1,174 @@
+# monsterpopulation.py
+import numpy as np
+
+import rng as rngservice
+from content import TABLES
+from wanderingMonster import WanderingMonster, MONSTER_NAMES, MONSTER_COLORS, DEFAULT_COLOR
+
+# Same directions WanderingMonster.move tries: down, up, right, left
+DIRECTIONS = np.array([(0, 1), (0, -1), (1, 0), (-1, 0)], dtype=np.int32)
+
+# Monster types are stored as ids into a name table; content packs can add many
+TYPE_DTYPE = np.int16
+MAX_TYPES = np.iinfo(TYPE_DTYPE).max + 1
+
+
+class MonsterPopulation:
+    def __init__(self, grid_width, grid_height, town_location, rng=None):
+        """
+        A whole map's worth of wandering monsters stored as NumPy arrays.
+
+        Behaves like a list of WanderingMonster objects (same names, colors,
+        gold range and movement rules) but moves every monster in one batch,
+        so very large populations stay cheap to simulate.
+
+        Parameters:
+            grid_width (int): Width of the grid.
+            grid_height (int): Height of the grid.
+            town_location (tuple): Coordinates of the town (x, y).
+            rng (numpy.random.Generator, optional): Random source. Defaults to the "population" stream.
+        """
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.town_location = town_location
+        self.rng = rng if rng is not None else rngservice.service.numpy("population")
+
+        self.type_names = list(MONSTER_NAMES)
+        self.type_ids = {name: i for i, name in enumerate(self.type_names)}
+        self.type_colors = np.array([MONSTER_COLORS[name] for name in self.type_names], dtype=np.uint8)
+
+        self.x = np.empty(0, dtype=np.int32)
+        self.y = np.empty(0, dtype=np.int32)
+        self.type_id = np.empty(0, dtype=TYPE_DTYPE)
+        self.gold = np.empty(0, dtype=np.int32)
+
+        # Tile index for at(): monster indices sorted by tile, rebuilt after anything moves
+        self.tile_order = None
+        self.tile_keys = None
+
+    def __len__(self):
+        return len(self.x)
+
+    @property
+    def colors(self):
+        """(N, 3) array of RGB colors, one row per monster."""
+        return self.type_colors[self.type_id]
+
+    def type_for(self, name):
+        """Return the type id for a monster name, adding unknown names to the table."""
+        type_id = self.type_ids.get(name)
+        if type_id is None:
+            if len(self.type_names) >= MAX_TYPES:
+                raise ValueError(f"MonsterPopulation holds at most {MAX_TYPES} monster types")
+            type_id = self.type_ids[name] = len(self.type_names)
+            self.type_names.append(name)
+            color = MONSTER_COLORS.get(name, DEFAULT_COLOR)
+            self.type_colors = np.vstack([self.type_colors, np.array([color], dtype=np.uint8)])
+        return type_id
+
+    def spawn(self, count):
+        """Add count monsters with random types, gold and positions off the town."""
+        # Pick from every tile except the town, the same as rejection sampling would
+        tiles = self.grid_width * self.grid_height
+        town_index = self.town_location[1] * self.grid_width + self.town_location[0]
+        index = self.rng.integers(0, tiles - 1, size=count)
+        index[index >= town_index] += 1
+
+        x = (index % self.grid_width).astype(np.int32)
+        y = (index // self.grid_width).astype(np.int32)
+
+        # Every zone rolls types and gold for all of its new monsters at once
+        depth = np.abs(x - self.town_location[0]) + np.abs(y - self.town_location[1])
+        zone_of = np.minimum(np.searchsorted(TABLES.zone_depths, depth, side="left"), len(TABLES.zones) - 1)
+        type_id = np.empty(count, dtype=TYPE_DTYPE)
+        gold = np.empty(count, dtype=np.int32)
+        for zone_index in np.unique(zone_of):
+            zone = TABLES.zones[zone_index]
+            members = np.flatnonzero(zone_of == zone_index)
+            zone_types = np.array([self.type_for(name) for name in zone.monsters.values], dtype=TYPE_DTYPE)
+            type_id[members] = zone_types[zone.monsters.table.sample_array(self.rng, len(members))]
+            gold[members] = np.array(zone.gold.values)[zone.gold.table.sample_array(self.rng, len(members))]
+
+        self.x = np.concatenate([self.x, x])
+        self.y = np.concatenate([self.y, y])
+        self.type_id = np.concatenate([self.type_id, type_id])
+        self.gold = np.concatenate([self.gold, gold])
+        self.tile_order = None
+
+    def step(self):
+        """
+        Move every monster one tile, exactly like WanderingMonster.move.
+
+        move() takes the first legal direction of a shuffled list, which is
+        the same as picking uniformly among the legal directions; here that
+        choice is made for all monsters at once. Monsters with no legal
+        direction stay put.
+        """
+        if not len(self):
+            return
+
+        new_x = self.x[:, None] + DIRECTIONS[:, 0]
+        new_y = self.y[:, None] + DIRECTIONS[:, 1]
+        legal = (new_x >= 0) & (new_x < self.grid_width) & (new_y >= 0) & (new_y < self.grid_height)
+        legal &= ~((new_x == self.town_location[0]) & (new_y == self.town_location[1]))
+
+        counts = legal.sum(axis=1)
+        pick = (self.rng.random(len(self)) * counts).astype(np.int32)
+        choice = np.argmax(np.cumsum(legal, axis=1) > pick[:, None], axis=1)
+
+        rows = np.arange(len(self))
+        can_move = counts > 0
+        self.x = np.where(can_move, new_x[rows, choice], self.x).astype(np.int32)
+        self.y = np.where(can_move, new_y[rows, choice], self.y).astype(np.int32)
+        self.tile_order = None
+
+    def build_tile_index(self):
+        keys = self.y.astype(np.int64) * self.grid_width + self.x
+        self.tile_order = np.argsort(keys, kind="stable")
+        self.tile_keys = keys[self.tile_order]
+
+    def at(self, position):
+        """
+        Return the indices of every monster standing on a tile, lowest first.
+
+        The first call after monsters move sorts them by tile; every
+        lookup after that is a binary search, so checking many tiles per
+        step stays cheap.
+        """
+        if self.tile_order is None:
+            self.build_tile_index()
+        key = position[1] * self.grid_width + position[0]
+        start, end = np.searchsorted(self.tile_keys, [key, key + 1])
+        return self.tile_order[start:end]
+
+    def remove(self, indices):
+        """Remove the monsters at the given indices."""
+        keep = np.ones(len(self), dtype=bool)
+        keep[indices] = False
+        self.x = self.x[keep]
+        self.y = self.y[keep]
+        self.type_id = self.type_id[keep]
+        self.gold = self.gold[keep]
+        self.tile_order = None
+
+    def name(self, index):
+        return self.type_names[self.type_id[index]]
+
+    @staticmethod
+    def from_monsters(monsters, grid_width, grid_height, town_location, rng=None):
+        """Build a population from a list of WanderingMonster instances."""
+        population = MonsterPopulation(grid_width, grid_height, town_location, rng)
+        population.x = np.array([m.x for m in monsters], dtype=np.int32)
+        population.y = np.array([m.y for m in monsters], dtype=np.int32)
+        population.type_id = np.array([population.type_for(m.name) for m in monsters], dtype=TYPE_DTYPE)
+        population.gold = np.array([m.gold for m in monsters], dtype=np.int32)
+        return population
+
+    def to_monsters(self, occupancy=None):
+        """Turn the population back into a list of WanderingMonster instances."""
+        monsters = []
+        for i in range(len(self)):
+            monsters.append(WanderingMonster(self.grid_width, self.grid_height, self.town_location,
+                                             self.name(i), (int(self.x[i]), int(self.y[i])), occupancy,
+                                             int(self.gold[i])))
+        return monsters
@@ -1,4 +1,9 @@
+from events import emit, ItemAdded
+
+
 class NPC:
+    __slots__ = ("name", "position", "dialogue", "item")
+
     def __init__(self, name, position, dialogue, item=None):
         self.name = name
         self.position = position  # tuple (x, y)
@@ -9,5 +14,5 @@ class NPC:
         print(f"\n{self.name} says: '{self.dialogue}'")
         if self.item:
             print(f"{self.name} gives you a {self.item['name']}!")
-            player['inventory'].append(self.item)
+            emit(player, ItemAdded(self.item))
             self.item = None  # remove item after giving
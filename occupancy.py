@@ -0,0 +1,47 @@
+# occupancy.py
+
+class OccupancyGrid:
+    def __init__(self):
+        """
+        Index of which entities stand on which tile.
+
+        Monsters, NPCs and anything else on the map register here so that
+        "what is on this tile?" is a single dict lookup instead of a scan
+        over every entity list.
+        """
+        self.tiles = {}  # (x, y) -> list of entities
+
+    def add(self, entity, position):
+        """Register an entity on a tile."""
+        self.tiles.setdefault(tuple(position), []).append(entity)
+
+    def remove(self, entity, position):
+        """Remove an entity from a tile. Does nothing if it isn't there."""
+        position = tuple(position)
+        occupants = self.tiles.get(position)
+        if not occupants:
+            return
+        # Compare by identity, two monsters of the same type are still different monsters
+        for i, other in enumerate(occupants):
+            if other is entity:
+                del occupants[i]
+                break
+        if not occupants:
+            del self.tiles[position]
+
+    def move(self, entity, old_position, new_position):
+        """Move an entity from one tile to another."""
+        self.remove(entity, old_position)
+        self.add(entity, new_position)
+
+    def at(self, position):
+        """Return a list of the entities on a tile (a copy, safe to modify)."""
+        return list(self.tiles.get(tuple(position), ()))
+
+    def is_free(self, position):
+        """Return True if nothing is registered on a tile."""
+        return tuple(position) not in self.tiles
+
+    def __len__(self):
+        """Number of occupied tiles."""
+        return len(self.tiles)
@@ -0,0 +1,86 @@
+"""
+Shared distance fields for monster movement.
+
+Instead of every monster searching for its own path to the player, one
+breadth-first search from the player fills in how many steps each tile
+is from them. Any number of monsters can then chase (step to a
+neighbour one closer) or flee (step to a neighbour further away) with a
+few lookups each, so a tick costs one search over the area, however many
+monsters are in it.
+"""
+
+from collections import deque
+
+# Same order WanderingMonster.move tries: down, up, right, left
+DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+UNREACHABLE = -1
+
+
+class DistanceField:
+    def __init__(self, sources, bounds, blocked=()):
+        """
+        Breadth-first step counts from the nearest source tile.
+
+        Parameters:
+            sources (list): Tiles (x, y) the distances are measured from, e.g. [player tile].
+            bounds (tuple): (x0, y0, x1, y1) area to search, end exclusive.
+            blocked (set): Tiles nothing may walk onto (town, NPCs, ...).
+        """
+        self.bounds = bounds
+        x0, y0, x1, y1 = bounds
+        self.width = x1 - x0
+        self.distances = [UNREACHABLE] * (self.width * (y1 - y0))
+
+        frontier = deque()
+        for x, y in sources:
+            if self.contains(x, y):
+                self.distances[self.index(x, y)] = 0
+                frontier.append((x, y))
+
+        distances = self.distances
+        while frontier:
+            x, y = frontier.popleft()
+            next_distance = distances[self.index(x, y)] + 1
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if not (x0 <= nx < x1 and y0 <= ny < y1):
+                    continue
+                i = (ny - y0) * self.width + (nx - x0)
+                if distances[i] == UNREACHABLE and (nx, ny) not in blocked:
+                    distances[i] = next_distance
+                    frontier.append((nx, ny))
+
+    def contains(self, x, y):
+        x0, y0, x1, y1 = self.bounds
+        return x0 <= x < x1 and y0 <= y < y1
+
+    def index(self, x, y):
+        return (y - self.bounds[1]) * self.width + (x - self.bounds[0])
+
+    def distance(self, x, y):
+        """Steps from (x, y) to the nearest source, or None if it can't be reached."""
+        if not self.contains(x, y):
+            return None
+        distance = self.distances[self.index(x, y)]
+        return None if distance == UNREACHABLE else distance
+
+    def next_step(self, x, y, away=False):
+        """
+        Return the neighbouring tile to move to, or None if there's no better one.
+
+        Parameters:
+            x (int), y (int): Where the mover stands now.
+            away (bool): Move away from the sources instead of towards them.
+        """
+        here = self.distance(x, y)
+        if here is None:
+            return None
+        best, best_distance = None, here
+        for dx, dy in DIRECTIONS:
+            distance = self.distance(x + dx, y + dy)
+            if distance is None:
+                continue
+            if (distance > best_distance) if away else (distance < best_distance):
+                best, best_distance = (x + dx, y + dy), distance
+        return best
@@ -0,0 +1,195 @@
+"""
+Opt-in timers and counters for the map loop.
+
+Set ADVENTURE_PROFILE=1 to turn them on. While profiling, the map
+records how long each phase of a frame takes (drawing, monster moves,
+NPC checks, ...) and:
+
+    F3  shows or hides an overlay with frame time percentiles and per-phase cost
+    F4  starts or stops cProfile; stopping writes map_profile.prof and prints the top entries
+
+Leaving the map writes everything recorded so far to map_trace.json, a
+Chrome trace (open it in chrome://tracing or https://ui.perfetto.dev)
+whose "otherData" holds the same summary as the overlay.
+
+When profiling is off, phase() hands back a do-nothing context manager,
+so the instrumentation left in the loop costs almost nothing.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import time
+from collections import deque
+
+TRACE_FILE = "map_trace.json"
+CPROFILE_FILE = "map_profile.prof"
+
+# Phases spent waiting on the player; they count towards the trace but not the frame time
+IDLE_PHASES = ("wait", "fights")
+
+OVERLAY_BACKGROUND = (0, 0, 0)
+OVERLAY_COLOR = (255, 255, 255)
+
+
+class NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_PHASE = NullPhase()
+
+
+class Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Profiler:
+    def __init__(self, enabled=False, history=600, max_events=200_000):
+        """
+        Parameters:
+            enabled (bool): Whether anything is recorded.
+            history (int): Frames kept for the percentiles and per-phase averages.
+            max_events (int): Trace events kept; older ones are dropped first.
+        """
+        self.enabled = enabled
+        self.overlay = False
+        self.cprofile = None
+        self.origin = time.perf_counter()
+        self.frame_times = deque(maxlen=history)
+        self.phase_times = {}  # phase -> deque of seconds per frame
+        self.counters = {}     # counter -> total
+        self.frame = {}        # phase -> seconds so far in the current frame
+        self.frame_counters = {}
+        self.events = deque(maxlen=max_events)
+        self.font = None
+
+    # ---------------------------------------------------
+    # Recording
+    # ---------------------------------------------------
+    def phase(self, name):
+        """Context manager that times one phase of the current frame."""
+        if not self.enabled:
+            return NULL_PHASE
+        return Phase(self, name)
+
+    def record(self, name, start, end):
+        self.frame[name] = self.frame.get(name, 0.0) + (end - start)
+        self.events.append({"name": name, "ph": "X", "pid": os.getpid(), "tid": 1,
+                            "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6})
+
+    def count(self, name, amount=1):
+        """Add to a named counter for the current frame."""
+        if self.enabled:
+            self.frame_counters[name] = self.frame_counters.get(name, 0) + amount
+
+    def end_frame(self):
+        """Close the current frame and fold it into the history."""
+        if not self.enabled:
+            return
+        busy = sum(seconds for name, seconds in self.frame.items() if name not in IDLE_PHASES)
+        self.frame_times.append(busy)
+        for name in self.frame.keys() - self.phase_times.keys():
+            # Earlier frames spent nothing in a phase seen for the first time
+            self.phase_times[name] = deque([0.0] * (len(self.frame_times) - 1), maxlen=self.frame_times.maxlen)
+        for name, times in self.phase_times.items():
+            times.append(self.frame.get(name, 0.0))
+
+        if self.frame_counters:
+            for name, amount in self.frame_counters.items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+            self.events.append({"name": "counters", "ph": "C", "pid": os.getpid(), "tid": 1,
+                                "ts": (time.perf_counter() - self.origin) * 1e6,
+                                "args": dict(self.frame_counters)})
+        self.frame = {}
+        self.frame_counters = {}
+
+    # ---------------------------------------------------
+    # Reporting
+    # ---------------------------------------------------
+    def percentile(self, fraction):
+        """Frame time (seconds) that the given fraction of recent frames came in under."""
+        if not self.frame_times:
+            return 0.0
+        ordered = sorted(self.frame_times)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def summary(self):
+        """Frame percentiles, average ms per phase and counter totals."""
+        return {
+            "frames": len(self.frame_times),
+            "frame_ms": {f"p{int(p * 100)}": self.percentile(p) * 1000 for p in (0.5, 0.95, 0.99)},
+            "phase_ms": {name: sum(times) / len(times) * 1000 for name, times in self.phase_times.items() if times},
+            "counters": dict(self.counters),
+        }
+
+    def save(self, filename=TRACE_FILE):
+        """Write a Chrome trace of the recorded phases, with the summary as otherData."""
+        with open(filename, "w") as f:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms",
+                       "otherData": self.summary()}, f)
+
+    def overlay_lines(self):
+        summary = self.summary()
+        frame = summary["frame_ms"]
+        lines = [f"frame p50 {frame['p50']:.2f}  p95 {frame['p95']:.2f}  p99 {frame['p99']:.2f} ms"]
+        for name, ms in sorted(summary["phase_ms"].items(), key=lambda item: -item[1]):
+            if name not in IDLE_PHASES:
+                lines.append(f"{name:<10} {ms:6.2f} ms")
+        return lines
+
+    def draw_overlay(self, screen):
+        """Draw the overlay in the top-left corner; return the rect it covers."""
+        import pygame
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.Font(None, 16)
+        rendered = [self.font.render(line, True, OVERLAY_COLOR) for line in self.overlay_lines()]
+        width = max(text.get_width() for text in rendered) + 8
+        height = sum(text.get_height() for text in rendered) + 8
+        rect = pygame.Rect(0, 0, width, height).clip(screen.get_rect())
+        screen.fill(OVERLAY_BACKGROUND, rect)
+        y = 4
+        for text in rendered:
+            screen.blit(text, (4, y))
+            y += text.get_height()
+        return rect
+
+    # ---------------------------------------------------
+    # Hotkeys
+    # ---------------------------------------------------
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+
+    def toggle_cprofile(self, filename=CPROFILE_FILE):
+        """Start cProfile, or stop it, save the stats and print the most expensive calls."""
+        if self.cprofile is None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+            print("cProfile started (F4 to stop).")
+            return
+        self.cprofile.disable()
+        self.cprofile.dump_stats(filename)
+        print(f"cProfile stopped; stats written to {filename}")
+        pstats.Stats(self.cprofile).sort_stats("cumulative").print_stats(15)
+        self.cprofile = None
+
+
+# The profiler the map reports to
+profiler = Profiler(enabled=bool(os.environ.get("ADVENTURE_PROFILE")))
@@ -0,0 +1,189 @@
+"""
+Record a play session and replay it exactly.
+
+    python replay.py record session.log [--seed N]
+    python replay.py play session.log [--verbose]
+
+Recording plays the game normally but logs the RNG seed, every line typed
+and, for each map frame where something happened, the key presses and
+the number of simulation ticks. Playing feeds that log back in with
+no window and no waiting, and checks that the game printed exactly the
+same thing. Both run in a fresh temporary directory, so saves left over
+from other games can't change the outcome.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+import gameinput
+import rng
+
+LOG_VERSION = 3
+
+# pygame prints a banner on import, which would land in one transcript but not the other
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+
+class ReplayFinished(Exception):
+    """The recorded session has no more input."""
+
+
+class Transcript:
+    def __init__(self, stream, echo=True):
+        """Stands in for sys.stdout, hashing everything the game prints."""
+        self.stream = stream
+        self.echo = echo
+        self.hash = hashlib.sha256()
+
+    def write(self, text):
+        self.hash.update(text.encode("utf-8"))
+        if self.echo:
+            self.stream.write(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def digest(self):
+        return self.hash.hexdigest()
+
+
+def event_record(event):
+    """Return a loggable [type, key] for events the map reacts to, or None."""
+    import pygame
+    if event.type == pygame.QUIT:
+        return [event.type, None]
+    if event.type == pygame.KEYDOWN:
+        return [event.type, event.key]
+    return None
+
+
+class RecordingInput(gameinput.LiveInput):
+    def __init__(self, log):
+        """Live input that also writes everything it returns to a log file."""
+        self.log = log
+
+    def write(self, entry):
+        self.log.write(json.dumps(entry) + "\n")
+        self.log.flush()
+
+    def ask(self, prompt=""):
+        sys.stdout.write(prompt)
+        sys.stdout.flush()
+        answer = input()
+        self.write({"ask": answer})
+        return answer
+
+    def map_frame(self, timestep):
+        events, ticks = super().map_frame(timestep)
+        records = [record for record in map(event_record, events) if record]
+        # Frames with no input and no tick change nothing, so they aren't logged
+        if records or ticks:
+            self.write({"events": records, "ticks": ticks})
+        return events, ticks
+
+
+class ReplayInput:
+    """Input read back from a recorded log, with rendering turned off."""
+    renders = False
+
+    def __init__(self, entries):
+        self.entries = iter(entries)
+
+    def next_entry(self, kind):
+        for entry in self.entries:
+            if kind in entry:
+                return entry
+        raise ReplayFinished()
+
+    def ask(self, prompt=""):
+        sys.stdout.write(prompt)
+        return self.next_entry("ask")["ask"]
+
+    def map_frame(self, timestep):
+        import pygame
+        frame = self.next_entry("events")
+        events = [pygame.event.Event(kind, key=key) if key is not None else pygame.event.Event(kind)
+                  for kind, key in frame["events"]]
+        return events, frame["ticks"]
+
+
+def run_game():
+    """Run the game until it returns, exits, or the replay runs out of input."""
+    import game
+    try:
+        game.main()
+    except (SystemExit, ReplayFinished):
+        pass
+
+
+def record(path, seed=None):
+    path = os.path.abspath(path)
+    rng.service.reseed(seed)
+    transcript = Transcript(sys.stdout)
+    with open(path, "w") as log, tempfile.TemporaryDirectory() as workdir:
+        log.write(json.dumps({"version": LOG_VERSION, "seed": rng.service.seed}) + "\n")
+        gameinput.source = RecordingInput(log)
+        os.chdir(workdir)
+        real_stdout, sys.stdout = sys.stdout, transcript
+        try:
+            run_game()
+        finally:
+            sys.stdout = real_stdout
+            os.chdir(os.path.dirname(path))
+            log.write(json.dumps({"end": transcript.digest()}) + "\n")
+    print(f"Session recorded to {path}")
+
+
+def play(path, verbose=False):
+    """Replay a log; return True if the game printed exactly what it did when recorded."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    with open(path) as log:
+        header = json.loads(log.readline())
+        entries = [json.loads(line) for line in log if line.strip()]
+    if header["version"] != LOG_VERSION:
+        raise ValueError(f"{path} was recorded by a different version of the game")
+
+    rng.service.reseed(header["seed"])
+    gameinput.source = ReplayInput(entries)
+    transcript = Transcript(sys.stdout, echo=verbose)
+    expected = next((entry["end"] for entry in entries if "end" in entry), None)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        real_stdout, sys.stdout = sys.stdout, transcript
+        try:
+            run_game()
+        finally:
+            sys.stdout = real_stdout
+            os.chdir(cwd)
+
+    matches = expected == transcript.digest()
+    print("Replay matches the recording." if matches else "Replay DIFFERS from the recording!")
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay an Adventure Game session.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="play and record a session")
+    record_parser.add_argument("log")
+    record_parser.add_argument("--seed", type=int, default=None, help="RNG seed (default: random)")
+    play_parser = commands.add_parser("play", help="replay a recorded session")
+    play_parser.add_argument("log")
+    play_parser.add_argument("--verbose", action="store_true", help="print the game's output")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.log, args.seed)
+    else:
+        sys.exit(0 if play(args.log, args.verbose) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Seeded random number streams for the Adventure Game.
+
+Every part of the game that rolls dice asks for its own named stream
+("encounters", "loot", "spawn", "wander", ...) instead of using the
+global random module. Each stream is seeded from the service seed and
+its name alone, so one subsystem drawing more numbers never shifts what
+another one gets, and a whole session can be reproduced from one seed.
+"""
+
+import hashlib
+import random
+
+
+def derive_seed(seed, name):
+    """Turn (seed, stream name) into a 64-bit seed."""
+    digest = hashlib.sha256(f"{seed}:{name}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+class RandomService:
+    def __init__(self, seed=None):
+        """
+        Parameters:
+            seed (int, optional): Master seed. If None, a random one is picked.
+        """
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        """Start every stream over from a new master seed."""
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.streams = {}
+        self.generators = {}
+
+    def stream(self, name):
+        """Return the random.Random for a subsystem, creating it on first use."""
+        rng = self.streams.get(name)
+        if rng is None:
+            rng = self.streams[name] = random.Random(derive_seed(self.seed, name))
+        return rng
+
+    def numpy(self, name):
+        """Return a numpy.random.Generator for bulk draws in a subsystem."""
+        generator = self.generators.get(name)
+        if generator is None:
+            import numpy as np
+            generator = self.generators[name] = np.random.default_rng(derive_seed(self.seed, "numpy:" + name))
+        return generator
+
+
+# The service the game uses
+service = RandomService()
+
+
+def stream(name):
+    return service.stream(name)
@@ -0,0 +1,91 @@
+"""
+Weighted random picks in constant time.
+
+AliasTable implements Vose's alias method: after an O(n) setup, every
+pick costs one random number and one comparison, however many entries
+the table has. WeightedTable pairs one with the values it picks from.
+"""
+
+
+class AliasTable:
+    __slots__ = ("probability", "alias", "arrays")
+
+    def __init__(self, weights):
+        """
+        Parameters:
+            weights (list): Relative weight of each index; they don't need to add up to anything.
+        """
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0 or min(weights) < 0:
+            raise ValueError("an alias table needs non-negative weights with a positive total")
+
+        # Scale so the average column holds exactly 1, then let full columns top up the short ones
+        scaled = [weight * n / total for weight in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        probability = [1.0] * n
+        alias = list(range(n))
+        while small and large:
+            short, full = small.pop(), large.pop()
+            probability[short] = scaled[short]
+            alias[short] = full
+            scaled[full] += scaled[short] - 1.0
+            (small if scaled[full] < 1.0 else large).append(full)
+        # Whatever is left is 1 up to rounding error
+
+        self.probability = tuple(probability)
+        self.alias = tuple(alias)
+        self.arrays = None
+
+    def __len__(self):
+        return len(self.probability)
+
+    def sample(self, rng):
+        """Pick an index with a random.Random; the column and the coin flip share one draw."""
+        u = rng.random() * len(self.probability)
+        i = int(u)
+        return i if u - i < self.probability[i] else self.alias[i]
+
+    def sample_many(self, rng, count):
+        """Pick count indices with a random.Random."""
+        probability, alias, n = self.probability, self.alias, len(self.probability)
+        picks = []
+        for _ in range(count):
+            u = rng.random() * n
+            i = int(u)
+            picks.append(i if u - i < probability[i] else alias[i])
+        return picks
+
+    def sample_array(self, generator, count):
+        """Pick count indices at once with a numpy.random.Generator; returns an int array."""
+        import numpy as np
+        if self.arrays is None:
+            self.arrays = (np.array(self.probability), np.array(self.alias, dtype=np.intp))
+        probability, alias = self.arrays
+        u = generator.random(count) * len(self.probability)
+        i = u.astype(np.intp)
+        return np.where(u - i < probability[i], i, alias[i])
+
+
+class WeightedTable:
+    __slots__ = ("values", "table")
+
+    def __init__(self, values, weights=None):
+        """
+        Parameters:
+            values (list): What can be picked.
+            weights (list, optional): Relative weight of each value. Equal if None.
+        """
+        self.values = tuple(values)
+        self.table = AliasTable(weights if weights is not None else [1] * len(self.values))
+
+    def __len__(self):
+        return len(self.values)
+
+    def pick(self, rng):
+        return self.values[self.table.sample(rng)]
+
+    def pick_many(self, rng, count):
+        values = self.values
+        return [values[i] for i in self.table.sample_many(rng, count)]
@@ -0,0 +1,198 @@
+"""
+Crash-safe save files for the Adventure Game.
+
+Snapshots are written to a temporary file and renamed over the old one,
+so a crash mid-save leaves the previous save intact. Snapshots can be
+plain JSON or a compact binary form (zlib-compressed JSON behind a short
+header); load_snapshot tells them apart on its own.
+
+A SaveContainer keeps several named sections (player, map, monsters,
+NPCs) in one versioned file with an index up front, so each section can
+be read on its own without parsing the rest.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import zlib
+
+BINARY_MAGIC = b"AGSAVE1\n"
+
+# Read once at import, since setting the umask to read it isn't thread-safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+# ---------------------------------------------------
+# Snapshots
+# ---------------------------------------------------
+def atomic_write(filename, payload):
+    """Write bytes to filename so readers see either the old or the new file, never half of one."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(filename))
+    try:
+        # mkstemp makes the file private; give it the permissions a plain open() would have
+        try:
+            mode = os.stat(filename).st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(temp_path, mode)
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, filename)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    fsync_directory(directory)
+
+
+def fsync_directory(directory):
+    """Make renames and removals in a directory survive a crash (where the OS allows it)."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return  # e.g. Windows, which can't open a directory
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def encode(data, fmt="json"):
+    """Turn data into bytes in the given format ("json" or "binary")."""
+    if fmt == "json":
+        return json.dumps(data, indent=4).encode("utf-8")
+    if fmt == "binary":
+        compact = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        return BINARY_MAGIC + zlib.compress(compact)
+    raise ValueError(f"Unknown save format: {fmt}")
+
+
+def decode(payload):
+    """Turn bytes written by encode back into data, whatever the format."""
+    if payload.startswith(BINARY_MAGIC):
+        payload = zlib.decompress(payload[len(BINARY_MAGIC):])
+    return json.loads(payload.decode("utf-8"))
+
+
+def save_snapshot(filename, data, fmt="json"):
+    atomic_write(filename, encode(data, fmt))
+
+
+def load_snapshot(filename):
+    with open(filename, "rb") as f:
+        return decode(f.read())
+
+
+# ---------------------------------------------------
+# One file, many sections
+# ---------------------------------------------------
+CONTAINER_MAGIC = b"AGSAVE-CONTAINER\n"
+CONTAINER_VERSION = 1
+
+# One lock per container file, so two threads saving different sections don't undo each other
+# and nobody reads a file halfway through it being replaced. Reentrant, since save() reads too.
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+
+def file_lock(filename):
+    with _file_locks_guard:
+        return _file_locks.setdefault(os.path.abspath(filename), threading.RLock())
+
+
+class SaveContainer:
+    def __init__(self, filename, fmt="json"):
+        """
+        A single save file made of named sections that load on demand.
+
+        The file is a magic line, a one-line JSON index of section offsets,
+        then each section encoded on its own. Opening the container only
+        reads the index; get() reads just the section asked for, and save()
+        copies untouched sections across without decoding them.
+
+        Parameters:
+            filename (str): Path of the container file.
+            fmt (str): Format for sections written by save() ("json" or "binary").
+        """
+        self.filename = filename
+        self.fmt = fmt
+        self.index = None    # section name -> [offset, length] in the file on disk
+        self.loaded = {}     # section name -> data already read or set
+        self.dirty = set()   # sections set() since the last save()
+
+    def exists(self):
+        return os.path.exists(self.filename)
+
+    def read_header(self, f):
+        """Read the magic line and index from an open container; return (sections, offset the data starts at)."""
+        if f.readline() != CONTAINER_MAGIC:
+            raise ValueError(f"{self.filename} is not a save container")
+        header = json.loads(f.readline().decode("utf-8"))
+        if header["version"] > CONTAINER_VERSION:
+            raise ValueError(f"{self.filename} was written by a newer version of the game")
+        return header["sections"], f.tell()
+
+    def read_index(self):
+        """Read the section index from disk (once)."""
+        if self.index is not None:
+            return self.index
+        with file_lock(self.filename):
+            if not self.exists():
+                self.index = {}
+                return self.index
+            with open(self.filename, "rb") as f:
+                self.index, _ = self.read_header(f)
+        return self.index
+
+    def read_raw(self, name):
+        # The file may have been saved again since read_index(), so use the index of the copy being read
+        with file_lock(self.filename):
+            with open(self.filename, "rb") as f:
+                sections, data_start = self.read_header(f)
+                offset, length = sections[name]
+                f.seek(data_start + offset)
+                return f.read(length)
+
+    def has(self, name):
+        return name in self.loaded or name in self.read_index()
+
+    def get(self, name, default=None):
+        """Return a section, reading it from disk the first time it's asked for."""
+        if name not in self.loaded:
+            if name not in self.read_index():
+                return default
+            self.loaded[name] = decode(self.read_raw(name))
+        return self.loaded[name]
+
+    def set(self, name, data):
+        """Replace a section. It is written on the next save()."""
+        self.loaded[name] = data
+        self.dirty.add(name)
+
+    def save(self):
+        """Atomically write every section, re-encoding only the ones that were set()."""
+        with file_lock(self.filename):
+            # Another thread may have saved since the index was read; copy its sections, not stale offsets
+            self.index = None
+            names = sorted(set(self.read_index()) | set(self.loaded))
+            payloads = {}
+            for name in names:
+                if name in self.dirty or name not in self.index:
+                    payloads[name] = encode(self.loaded[name], self.fmt)
+                else:
+                    payloads[name] = self.read_raw(name)
+
+            sections = {}
+            offset = 0
+            for name in names:
+                sections[name] = [offset, len(payloads[name])]
+                offset += len(payloads[name])
+            header = json.dumps({"version": CONTAINER_VERSION, "sections": sections}).encode("utf-8")
+
+            atomic_write(self.filename, CONTAINER_MAGIC + header + b"\n" + b"".join(payloads[name] for name in names))
+        self.dirty.clear()
+        self.index = None
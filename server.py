@@ -0,0 +1,257 @@
+"""
+Host many Adventure Game sessions in one process.
+
+    python server.py [--host 127.0.0.1] [--port 4000] [--unix PATH] [--protocol line|json]
+
+Each connection logs in with a name and then plays the normal game
+(gamefunctions.main) with its own player, map and save folder under
+--save-root. The game code still calls ask() and print() as if it had
+a terminal to itself: every session runs in its own worker thread, and
+gameinput and sys.stdout look up which session the calling thread
+belongs to. The asyncio side only moves lines between sockets and those
+threads, so a session waiting for its player costs a sleeping thread
+and nothing else.
+
+Protocols:
+    line  Plain text both ways. Prompts are sent without a newline, like
+          a terminal; every line received answers the current prompt.
+    json  One JSON object per line. The server sends {"output": text} and
+          {"prompt": text}; the client answers with {"input": text}.
+
+On the map, sessions move with w/a/s/d (one step and one simulation
+tick per command); q quits, like closing the map window does.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import queue
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import gamefunctions
+import gameinput
+
+LOGIN_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,32}")
+MAP_KEYS = {"w": "K_UP", "s": "K_DOWN", "a": "K_LEFT", "d": "K_RIGHT"}
+
+# The session whose thread is running, so print() output reaches the right client
+current_session = contextvars.ContextVar("current_session", default=None)
+
+
+class SessionClosed(Exception):
+    """The client went away while the game was waiting for input."""
+
+
+class SessionOutput:
+    def __init__(self, fallback):
+        """Stands in for sys.stdout, sending each session's output to its own client."""
+        self.fallback = fallback
+
+    def write(self, text):
+        session = current_session.get()
+        return (session or self.fallback).write(text)
+
+    def flush(self):
+        session = current_session.get()
+        (session or self.fallback).flush()
+
+
+class Session:
+    """One connected player: their input queue, pending output and socket writer."""
+    renders = False
+
+    def __init__(self, loop, writer, protocol):
+        self.loop = loop
+        self.writer = writer
+        self.protocol = protocol
+        self.inputs = queue.Queue()
+        self.output = []
+
+    # ---------------------------------------------------
+    # Called from the session's game thread
+    # ---------------------------------------------------
+    def write(self, text):
+        self.output.append(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def send(self, kind, text):
+        if self.protocol == "json":
+            data = json.dumps({kind: text}) + "\n"
+        else:
+            data = text
+        self.loop.call_soon_threadsafe(self.writer.write, data.encode("utf-8"))
+
+    def send_output(self):
+        if self.output:
+            self.send("output", "".join(self.output))
+            self.output = []
+
+    def ask(self, prompt=""):
+        self.send_output()
+        self.send("prompt", prompt)
+        line = self.inputs.get()
+        if line is None:
+            raise SessionClosed()
+        return line
+
+    def map_frame(self, timestep):
+        import pygame
+        command = self.ask("Move (w/a/s/d) or q to quit: ").strip().lower()
+        if command == "q":
+            return [pygame.event.Event(pygame.QUIT)], 0
+        if command in MAP_KEYS:
+            return [pygame.event.Event(pygame.KEYDOWN, key=getattr(pygame, MAP_KEYS[command]))], 1
+        return [], 0
+
+    # ---------------------------------------------------
+    # Called from the event loop
+    # ---------------------------------------------------
+    def receive(self, line):
+        """Hand one line from the client to the game thread."""
+        if self.protocol == "json":
+            try:
+                line = json.loads(line)["input"]
+            except (ValueError, KeyError, TypeError):
+                pass
+        self.inputs.put(line)
+
+    def close(self):
+        self.inputs.put(None)
+
+
+class GameServer:
+    def __init__(self, save_root="sessions", max_sessions=512, protocol="line"):
+        """
+        Parameters:
+            save_root (str): Folder holding one save folder per login.
+            max_sessions (int): Sessions played at once; later logins are turned away.
+            protocol (str): "line" or "json".
+        """
+        self.save_root = save_root
+        self.max_sessions = max_sessions
+        self.protocol = protocol
+        self.executor = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="session")
+        self.playing = set()
+        self.sessions = set()
+
+    def play(self, session):
+        """Run one game to the end in the calling (worker) thread."""
+        try:
+            gamefunctions.main()
+        except (SessionClosed, SystemExit):
+            pass
+        finally:
+            session.send_output()
+
+    async def handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        session = Session(loop, writer, self.protocol)
+        self.sessions.add(session)
+        login = None
+        game = None
+        try:
+            login = await self.login(reader, session)
+            if login is None:
+                return
+
+            # Everything the game thread looks up per session lives in this context
+            context = contextvars.copy_context()
+            context.run(current_session.set, session)
+            context.run(gameinput.session_source.set, session)
+            context.run(gamefunctions.save_dir.set, os.path.join(self.save_root, login))
+            os.makedirs(os.path.join(self.save_root, login), exist_ok=True)
+            game = loop.run_in_executor(self.executor, context.run, self.play, session)
+
+            while not game.done():
+                read = asyncio.ensure_future(reader.readline())
+                await asyncio.wait([read, game], return_when=asyncio.FIRST_COMPLETED)
+                if not read.done():
+                    read.cancel()
+                    break
+                line = read.result()
+                if not line:
+                    session.close()
+                    break
+                session.receive(line.decode("utf-8", "replace").rstrip("\r\n"))
+            await game
+            await writer.drain()
+        except ConnectionError:
+            # Client dropped
+            session.close()
+        except asyncio.CancelledError:
+            # The server is shutting down
+            session.close()
+            raise
+        finally:
+            if game is not None and not game.done():
+                # The game thread is still unwinding and saving; the same login mustn't
+                # start another game on the same save folder until it has finished
+                await asyncio.wait([game])
+            self.sessions.discard(session)
+            self.playing.discard(login)
+            writer.close()
+
+    async def login(self, reader, session):
+        """Ask for a login name; return it, or None if the client gave up or the server is full."""
+        while True:
+            session.send("prompt", "Login name: ")
+            line = await reader.readline()
+            if not line:
+                return None
+            session.receive(line.decode("utf-8", "replace").rstrip("\r\n"))
+            login = session.inputs.get_nowait()
+            if not LOGIN_PATTERN.fullmatch(login):
+                session.send("output", "Names are 1-32 letters, digits, _ or -.\n")
+            elif login in self.playing:
+                session.send("output", f"{login} is already playing.\n")
+            elif len(self.playing) >= self.max_sessions:
+                session.send("output", "The server is full, try again later.\n")
+                return None
+            else:
+                self.playing.add(login)
+                return login
+
+    async def serve(self, host="127.0.0.1", port=4000, unix_path=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle, unix_path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        names = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Adventure Game server listening on {names}", file=sys.__stdout__)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            # Wake every game thread still waiting for input so the process can exit
+            for session in list(self.sessions):
+                session.close()
+            self.executor.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Adventure Game sessions over a socket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--protocol", choices=("line", "json"), default="line")
+    parser.add_argument("--save-root", default="sessions", help="folder for per-login saves")
+    parser.add_argument("--max-sessions", type=int, default=512)
+    args = parser.parse_args()
+
+    sys.stdout = SessionOutput(sys.stdout)
+    server = GameServer(args.save_root, args.max_sessions, args.protocol)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
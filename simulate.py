@@ -0,0 +1,180 @@
+"""
+Monte Carlo balance simulator for the Adventure Game.
+
+Plays many complete games with no terminal, using the real combat, shop
+and rest rules, spread across every CPU core. Each batch of runs gets
+its own seed derived from --seed, so results are the same no matter how
+many workers are used.
+
+Example (is the Sword worth 50 gold?):
+
+    python simulate.py --runs 1000000 --buy none
+    python simulate.py --runs 1000000 --buy sword
+"""
+
+import argparse
+import json
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import gamefunctions
+import rng
+from combat import resolve_fight
+from events import emit, HpChanged, WeaponEquipped
+
+SHOP_CHOICES = {"sword": ("1", "Sword"), "charm": ("2", "Monster Charm")}
+
+
+# ---------------------------------------------------
+# One simulated game
+# ---------------------------------------------------
+def play_run(buy="none", rest_below=10, max_days=100):
+    """
+    Play one game until the player dies or max_days town actions pass.
+
+    Each day the player picks one town menu option: rest when HP is below
+    rest_below, buy the chosen item when they have none and can afford it,
+    otherwise fight.
+
+    Returns:
+        tuple: (days survived, gold after each day, name of the killer or None)
+    """
+    player = gamefunctions.create_player()
+    gold_curve = []
+    choice, item_name = SHOP_CHOICES.get(buy, (None, None))
+
+    for day in range(max_days):
+        owned = player["inventory"].first(name=item_name) is not None
+        if player["hp"] < rest_below:
+            emit(player, HpChanged(gamefunctions.REST_HP, "rest"))
+        elif choice and not owned and gamefunctions.buy_item(player, choice):
+            item = player["inventory"][-1]
+            if item["type"] == "weapon":
+                emit(player, WeaponEquipped(player["inventory"].position(item)))
+        else:
+            monster = gamefunctions.random_monster()
+            result = resolve_fight(player, monster)
+            if result["outcome"] == "died":
+                return day, gold_curve, monster["name"]
+        gold_curve.append(player["gold"])
+
+    return max_days, gold_curve, None
+
+
+# ---------------------------------------------------
+# Batches and merging
+# ---------------------------------------------------
+def empty_stats():
+    return {
+        "runs": 0,
+        "survival": Counter(),    # days survived -> runs
+        "deaths": Counter(),      # monster name (or "survived") -> runs
+        "gold_sum": [],           # day -> total gold over runs alive that day
+        "gold_runs": []           # day -> runs alive that day
+    }
+
+def merge_stats(total, part):
+    """Add the histograms in part into total."""
+    total["runs"] += part["runs"]
+    total["survival"].update(part["survival"])
+    total["deaths"].update(part["deaths"])
+    for key in ("gold_sum", "gold_runs"):
+        extra = len(part[key]) - len(total[key])
+        if extra > 0:
+            total[key].extend([0] * extra)
+        for day, value in enumerate(part[key]):
+            total[key][day] += value
+    return total
+
+def run_batch(batch, runs, seed, buy, rest_below, max_days):
+    """Play a batch of runs in a worker, seeded from (seed, batch) alone."""
+    rng.service.reseed(seed * 1_000_003 + batch)
+    stats = empty_stats()
+    stats["gold_sum"] = [0] * max_days
+    stats["gold_runs"] = [0] * max_days
+
+    for _ in range(runs):
+        days, gold_curve, killer = play_run(buy, rest_below, max_days)
+        stats["runs"] += 1
+        stats["survival"][days] += 1
+        stats["deaths"][killer or "survived"] += 1
+        for day, gold in enumerate(gold_curve):
+            stats["gold_sum"][day] += gold
+            stats["gold_runs"][day] += 1
+    return stats
+
+def simulate(runs, seed=0, buy="none", rest_below=10, max_days=100, workers=None, batch_size=10000):
+    """Play runs games across a process pool and return the merged statistics."""
+    batches = []
+    for batch, start in enumerate(range(0, runs, batch_size)):
+        batches.append((batch, min(batch_size, runs - start)))
+
+    total = empty_stats()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run_batch, batch, count, seed, buy, rest_below, max_days)
+            for batch, count in batches
+        ]
+        for future in futures:
+            merge_stats(total, future.result())
+    return total
+
+
+# ---------------------------------------------------
+# Reporting
+# ---------------------------------------------------
+def summarize(stats):
+    runs = stats["runs"]
+    survival = stats["survival"]
+    mean_days = sum(days * n for days, n in survival.items()) / runs if runs else 0
+    gold_curve = [
+        total / alive if alive else 0
+        for total, alive in zip(stats["gold_sum"], stats["gold_runs"])
+    ]
+    return {
+        "runs": runs,
+        "mean_days_survived": mean_days,
+        "survival": dict(sorted(survival.items())),
+        "deaths": dict(stats["deaths"].most_common()),
+        "mean_gold_by_day": gold_curve
+    }
+
+def print_summary(summary):
+    runs = summary["runs"]
+    print(f"Runs: {runs:,}")
+    print(f"Mean days survived: {summary['mean_days_survived']:.2f}")
+    print("\nOutcome:")
+    for cause, n in summary["deaths"].items():
+        label = cause if cause == "survived" else f"killed by {cause}"
+        print(f"  {label:<20} {n / runs:7.2%}")
+    print("\nMean gold (players still alive):")
+    curve = summary["mean_gold_by_day"]
+    for day in range(0, len(curve), max(1, len(curve) // 10)):
+        print(f"  day {day + 1:>4}: {curve[day]:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many Adventure Game runs.")
+    parser.add_argument("--runs", type=int, default=100000, help="number of games to play")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed")
+    parser.add_argument("--buy", choices=["none", "sword", "charm"], default="none",
+                        help="item to buy when the player has none and can afford it")
+    parser.add_argument("--rest-below", type=int, default=10, help="rest when HP is below this")
+    parser.add_argument("--max-days", type=int, default=100, help="town actions per game")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="runs per worker task")
+    parser.add_argument("--json", metavar="FILE", help="also write the full histograms to FILE")
+    args = parser.parse_args()
+
+    stats = simulate(args.runs, args.seed, args.buy, args.rest_below, args.max_days,
+                     args.workers, args.batch_size)
+    summary = summarize(stats)
+    print_summary(summary)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
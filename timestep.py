@@ -0,0 +1,42 @@
+# timestep.py
+
+
+class FixedTimestep:
+    def __init__(self, tick_rate, frame_rate, max_frame_time=0.25):
+        """
+        Runs the simulation at a fixed rate, however fast frames are drawn.
+
+        Real time is added to an accumulator each frame and spent in whole
+        simulation ticks; what is left over says how far the next tick
+        along the current frame is, for interpolated drawing.
+
+        Parameters:
+            tick_rate (float): Simulation ticks per second.
+            frame_rate (int): Most frames drawn per second (0 for no cap).
+            max_frame_time (float): Longest frame counted, in seconds, so a long
+                pause (e.g. a fight in the terminal) doesn't trigger a burst of catch-up ticks.
+        """
+        self.dt = 1.0 / tick_rate
+        self.frame_rate = frame_rate
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.clock = None
+
+    def wait_frame(self):
+        """Sleep until the next frame is due; return the seconds since the last one."""
+        import pygame
+        if self.clock is None:
+            self.clock = pygame.time.Clock()
+        return min(self.clock.tick(self.frame_rate) / 1000.0, self.max_frame_time)
+
+    def advance(self, elapsed):
+        """Add elapsed seconds and return how many simulation ticks are now due."""
+        self.accumulator += elapsed
+        ticks = int(self.accumulator // self.dt)
+        self.accumulator -= ticks * self.dt
+        return ticks
+
+    @property
+    def alpha(self):
+        """How far (0 to 1) the simulation is between the last tick and the next."""
+        return self.accumulator / self.dt
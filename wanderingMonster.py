@@ -0,0 +1,234 @@
+# wanderingMonster.py
+import content
+import rng
+from content import TABLES
+
+# Monster types, the color each one is drawn with and how it reacts to a
+# player it can see ("chase", "flee", or "wander" to ignore them); see content/
+MONSTER_NAMES = TABLES.monster_names
+MONSTER_COLORS = TABLES.monster_colors
+MONSTER_BEHAVIORS = TABLES.monster_behaviors
+DEFAULT_COLOR = (255, 255, 255)
+# Monsters notice the player within this many steps
+SIGHT_RANGE = 6
+
+class MapGrid:
+    __slots__ = ("width", "height", "town_location", "occupancy")
+
+    def __init__(self, width, height, town_location, occupancy=None):
+        """
+        Map details shared by every monster on the same map.
+
+        Parameters:
+            width (int): Width of the grid.
+            height (int): Height of the grid.
+            town_location (tuple): Coordinates of the town (x, y).
+            occupancy (OccupancyGrid, optional): Shared tile index to keep up to date.
+        """
+        self.width = width
+        self.height = height
+        self.town_location = town_location
+        self.occupancy = occupancy
+
+    @staticmethod
+    def shared(width, height, town_location, occupancy=None):
+        """Return the MapGrid for these settings, reusing the last one if it matches."""
+        global _last_grid
+        grid = _last_grid
+        if (grid is None or grid.width != width or grid.height != height
+                or grid.town_location != town_location or grid.occupancy is not occupancy):
+            grid = _last_grid = MapGrid(width, height, town_location, occupancy)
+        return grid
+
+    def depth(self, x, y):
+        """Steps from the town to (x, y); spawn zones are rings of depth."""
+        return abs(x - self.town_location[0]) + abs(y - self.town_location[1])
+
+    def random_position(self, taken=()):
+        """Return a random tile that isn't the town, preferring ones nothing stands on (or in taken)."""
+        free_tiles = self.width * self.height - 1 - len(taken)
+        if self.occupancy is not None:
+            free_tiles -= len(self.occupancy)
+        spawn_rng = rng.stream("spawn")
+        while True:
+            x = spawn_rng.randint(0, self.width - 1)
+            y = spawn_rng.randint(0, self.height - 1)
+            if (x, y) == self.town_location:
+                continue
+            # Once the map is full, sharing a tile is better than looping forever
+            if free_tiles <= 0 or ((x, y) not in taken and (self.occupancy is None or self.occupancy.is_free((x, y)))):
+                return x, y
+
+
+_last_grid = None
+
+
+def reflect(value, size):
+    """Fold a coordinate that walked off the line 0..size-1 back onto it, as if it bounced off the ends."""
+    if size == 1:
+        return 0
+    period = 2 * (size - 1)
+    value %= period
+    return value if value < size else period - value
+
+
+class WanderingMonster:
+    # No per-instance __dict__; map details live on the shared MapGrid
+    __slots__ = ("grid", "name", "color", "gold", "x", "y")
+
+    def __init__(self, grid_width, grid_height, town_location, name=None, position=None, occupancy=None, gold=None):
+        """
+        Initializes a wandering monster on the map.
+
+        Parameters:
+            grid_width (int): Width of the grid.
+            grid_height (int): Height of the grid.
+            town_location (tuple): Coordinates of the town (x, y).
+            name (str, optional): Specific monster name. If None, picked from the zone it spawns in.
+            position (tuple, optional): Starting tile (x, y). If None, random.
+            occupancy (OccupancyGrid, optional): Shared tile index to keep up to date.
+            gold (int, optional): Gold it carries. If None, picked from the zone it spawns in.
+        """
+        self.grid = MapGrid.shared(grid_width, grid_height, town_location, occupancy)
+        self.x, self.y = position if position else self.random_position()
+        self.name = name if name else self.random_name()
+        self.color = self.assign_color()
+        self.gold = gold if gold is not None else self.zone().gold.pick(rng.stream("spawn"))
+        if self.occupancy is not None:
+            self.occupancy.add(self, (self.x, self.y))
+
+    @property
+    def grid_width(self):
+        return self.grid.width
+
+    @property
+    def grid_height(self):
+        return self.grid.height
+
+    @property
+    def town_location(self):
+        return self.grid.town_location
+
+    @property
+    def occupancy(self):
+        return self.grid.occupancy
+
+    def zone(self):
+        """Return the spawn zone of the monster's tile."""
+        return content.zone_at(self.grid.depth(self.x, self.y))
+
+    def random_name(self):
+        return self.zone().monsters.pick(rng.stream("spawn"))
+
+    def assign_color(self):
+        """Assign a color based on monster type."""
+        return MONSTER_COLORS.get(self.name, DEFAULT_COLOR)
+
+    def random_position(self):
+        """Return a random position not on the town, preferring empty tiles."""
+        return self.grid.random_position()
+
+    @property
+    def behavior(self):
+        return MONSTER_BEHAVIORS.get(self.name, "wander")
+
+    def move_to(self, new_x, new_y):
+        if self.occupancy is not None:
+            self.occupancy.move(self, (self.x, self.y), (new_x, new_y))
+        self.x, self.y = new_x, new_y
+
+    def move(self):
+        """Attempt to move the monster one tile in a random direction, avoiding town."""
+        directions = [(0,1), (0,-1), (1,0), (-1,0)]  # down, up, right, left
+        rng.stream("wander").shuffle(directions)
+        for dx, dy in directions:
+            new_x = self.x + dx
+            new_y = self.y + dy
+            if 0 <= new_x < self.grid_width and 0 <= new_y < self.grid_height:
+                if (new_x, new_y) != self.town_location:
+                    self.move_to(new_x, new_y)
+                    break
+
+    def wander(self, steps):
+        """
+        Take steps random steps at once, in constant time.
+
+        Every move() changes x + y by one and x - y by one, up or down
+        with equal odds and independently, so after n steps each has
+        moved 2 * Binomial(n, 1/2) - n; those are counted off random bits.
+        The map's edges bounce the walk back and a walk that ends on the
+        town steps off it, which is close to (not exactly) what n move()
+        calls would do near them.
+        """
+        if steps <= 0:
+            return
+        wander_rng = rng.stream("wander")
+        u = 2 * wander_rng.getrandbits(steps).bit_count() - steps
+        v = 2 * wander_rng.getrandbits(steps).bit_count() - steps
+        new_x = reflect(self.x + (u + v) // 2, self.grid_width)
+        new_y = reflect(self.y + (u - v) // 2, self.grid_height)
+        self.move_to(new_x, new_y)
+        if (new_x, new_y) == self.town_location:
+            self.move()
+
+    def act(self, field=None):
+        """
+        Take one step: chase or flee the player if they're in sight, otherwise wander.
+
+        Parameters:
+            field (DistanceField, optional): Distances to the player, shared by every monster.
+        """
+        behavior = self.behavior
+        if field is not None and behavior != "wander":
+            distance = field.distance(self.x, self.y)
+            if distance is not None and distance <= SIGHT_RANGE:
+                step = field.next_step(self.x, self.y, away=(behavior == "flee"))
+                if step is not None:
+                    self.move_to(*step)
+                # Nowhere better to go (e.g. cornered); it holds its ground rather than wandering off
+                return
+        self.move()
+
+    def position(self):
+        """Return the current position of the monster."""
+        return self.x, self.y
+
+    def despawn(self):
+        """Remove the monster from the occupancy index, if it has one."""
+        if self.occupancy is not None:
+            self.occupancy.remove(self, (self.x, self.y))
+
+    @staticmethod
+    def spawn_monsters(count, grid_width, grid_height, town_location, occupancy=None):
+        """
+        Create a list of WanderingMonster instances.
+
+        Positions are picked first; then every zone rolls the types and
+        gold for all of its new monsters in one batch.
+        """
+        grid = MapGrid.shared(grid_width, grid_height, town_location, occupancy)
+        # With an occupancy index, monsters avoid each other's tiles just as if spawned one by one
+        taken = set() if occupancy is not None else ()
+        positions = []
+        for _ in range(count):
+            position = grid.random_position(taken)
+            if occupancy is not None:
+                taken.add(position)
+            positions.append(position)
+
+        by_zone = {}
+        for i, (x, y) in enumerate(positions):
+            by_zone.setdefault(content.zone_index(grid.depth(x, y)), []).append(i)
+
+        spawn_rng = rng.stream("spawn")
+        names = [None] * count
+        golds = [None] * count
+        for zone_index, indices in by_zone.items():
+            zone = TABLES.zones[zone_index]
+            for i, name, gold in zip(indices, zone.monsters.pick_many(spawn_rng, len(indices)),
+                                     zone.gold.pick_many(spawn_rng, len(indices))):
+                names[i] = name
+                golds[i] = gold
+
+        return [WanderingMonster(grid_width, grid_height, town_location, names[i], positions[i], occupancy, golds[i])
+                for i in range(count)]
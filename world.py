@@ -0,0 +1,269 @@
+"""
+Chunked world model for the explorable map.
+
+The world is cut into square chunks. Only chunks near the player are
+kept in memory; the least recently used ones are written to disk and
+dropped once more than max_loaded are held, and read back (or generated
+for the first time) when the player comes near again. Monsters in
+chunks around the player wander, everything else stays frozen where it
+was, so the cost of a tick depends on the area around the player, not on
+the size of the world. Chunks are written by the autosave thread, so walking
+into a new area never waits for the disk.
+
+Only chunks near the player (what's on screen, or close enough to see
+them) are stepped every tick. Monsters anywhere else remember the tick
+they were last simulated at and, once their chunk comes near, catch up
+in one jump: a random walk of that many steps, sampled in constant time
+(WanderingMonster.wander). So a tick costs what the player can reach,
+yet the rest of the world doesn't stand still while they're away.
+"""
+
+import os
+from collections import OrderedDict
+
+import autosave
+import rng
+import savefile
+from wanderingMonster import WanderingMonster
+
+
+class ChunkedWorld:
+    def __init__(self, width, height, town_location, directory, occupancy=None,
+                 chunk_size=16, monsters_per_chunk=2, max_loaded=64, active_radius=1,
+                 near_radius=None, tick=0):
+        """
+        Parameters:
+            width (int): Width of the world in tiles.
+            height (int): Height of the world in tiles.
+            town_location (tuple): Coordinates of the town (x, y).
+            directory (str): Where evicted chunks are stored.
+            occupancy (OccupancyGrid, optional): Tile index for monsters in loaded chunks.
+            chunk_size (int): Width and height of a chunk in tiles.
+            monsters_per_chunk (int): Monsters placed in a chunk when it is first generated.
+            max_loaded (int): Chunks kept in memory before the oldest are evicted.
+            active_radius (int): Chunks this far from the player's chunk are kept loaded.
+            near_radius (int, optional): Chunks with a tile this many tiles or fewer from the
+                player are stepped every tick. None steps every loaded chunk around the player.
+            tick (int): Ticks simulated so far, carried over between visits.
+        """
+        self.width = width
+        self.height = height
+        self.town_location = town_location
+        # Absolute, since chunks are written on the autosave thread
+        self.directory = os.path.abspath(directory)
+        self.occupancy = occupancy
+        self.chunk_size = chunk_size
+        self.monsters_per_chunk = monsters_per_chunk
+        # Room for the active area plus one chunk a monster wanders into
+        self.max_loaded = max(max_loaded, (2 * active_radius + 1) ** 2 + 1)
+        self.active_radius = active_radius
+        self.near_radius = near_radius
+        self.tick = tick
+        self.chunks = OrderedDict()  # (cx, cy) -> list of monsters, least recently used first
+        self.active = []
+        self.near = []               # active chunks stepped every tick
+        self.synced = {}             # monster outside the near chunks -> tick it was last simulated at
+
+    # ---------------------------------------------------
+    # Chunk bookkeeping
+    # ---------------------------------------------------
+    def chunk_of(self, x, y):
+        return x // self.chunk_size, y // self.chunk_size
+
+    def chunk_bounds(self, key):
+        """Return (x0, y0, x1, y1) for a chunk, clipped to the world, end exclusive."""
+        x0 = key[0] * self.chunk_size
+        y0 = key[1] * self.chunk_size
+        return x0, y0, min(x0 + self.chunk_size, self.width), min(y0 + self.chunk_size, self.height)
+
+    def chunk_path(self, key):
+        return os.path.join(self.directory, f"chunk_{key[0]}_{key[1]}.sav")
+
+    def make_monster(self, record):
+        # Monsters saved without gold roll it like a new spawn; the rest leave the spawn stream alone
+        mon = WanderingMonster(self.width, self.height, self.town_location,
+                               record["name"], tuple(record["pos"]), self.occupancy, record.get("gold"))
+        self.synced[mon] = record.get("tick", self.tick)
+        return mon
+
+    def load_chunk(self, key, generate=True):
+        """Return a chunk's monsters, reading the chunk from disk or generating it if needed."""
+        if key in self.chunks:
+            self.chunks.move_to_end(key)
+            return self.chunks[key]
+
+        path = self.chunk_path(key)
+        # A chunk evicted a moment ago may not have reached the disk yet
+        queued = autosave.service.queued(path)
+        if queued is not None or os.path.exists(path):
+            records = queued[1] if queued is not None else savefile.load_snapshot(path)
+            self.chunks[key] = monsters = [self.make_monster(record) for record in records]
+        else:
+            self.chunks[key] = monsters = []
+            if generate:
+                self.spawn(key, self.monsters_per_chunk)
+        self.evict_extra(keep=key)
+        return monsters
+
+    def evict_extra(self, keep=None):
+        """Write the least recently used chunks to disk until few enough are loaded."""
+        for key in list(self.chunks):
+            if len(self.chunks) <= self.max_loaded:
+                break
+            if key != keep and key not in self.active:
+                self.evict(key)
+
+    def write_chunk(self, key):
+        """Queue a chunk's monsters to be written by the autosave thread."""
+        os.makedirs(self.directory, exist_ok=True)
+        records = [{"name": m.name, "pos": list(m.position()), "gold": m.gold, "tick": self.synced.get(m, self.tick)}
+                   for m in self.chunks[key]]
+        path = self.chunk_path(key)
+        autosave.service.submit(path, savefile.save_snapshot, path, records, "binary")
+
+    def evict(self, key):
+        self.write_chunk(key)
+        for mon in self.chunks.pop(key):
+            self.synced.pop(mon, None)
+            mon.despawn()
+
+    def save(self):
+        """Queue every loaded chunk to be written to disk."""
+        for key in self.chunks:
+            self.write_chunk(key)
+
+    # ---------------------------------------------------
+    # Monsters
+    # ---------------------------------------------------
+    def random_tile(self, key):
+        """Return a random tile in a chunk that isn't the town, preferring empty ones."""
+        x0, y0, x1, y1 = self.chunk_bounds(key)
+        tiles = (x1 - x0) * (y1 - y0)
+        spawn_rng = rng.stream("spawn")
+        for _ in range(4 * tiles):
+            x = spawn_rng.randint(x0, x1 - 1)
+            y = spawn_rng.randint(y0, y1 - 1)
+            if (x, y) == self.town_location:
+                continue
+            if self.occupancy is None or self.occupancy.is_free((x, y)):
+                return x, y
+        # Chunk is full (or only holds the town); share a tile instead
+        for _ in range(4 * tiles):
+            x = spawn_rng.randint(x0, x1 - 1)
+            y = spawn_rng.randint(y0, y1 - 1)
+            if (x, y) != self.town_location:
+                return x, y
+        return None
+
+    def spawn(self, key, count):
+        """Place count new monsters in a loaded chunk."""
+        monsters = self.chunks[key]
+        for _ in range(count):
+            position = self.random_tile(key)
+            if position is None:
+                break
+            mon = WanderingMonster(self.width, self.height, self.town_location,
+                                   position=position, occupancy=self.occupancy)
+            monsters.append(mon)
+            if key not in self.near:
+                self.synced[mon] = self.tick
+
+    def add(self, record):
+        """Put a monster saved as {"name", "pos"[, "gold"]} into the world."""
+        key = self.chunk_of(*record["pos"])
+        self.load_chunk(key, generate=False).append(self.make_monster(record))
+
+    def remove(self, mon):
+        """Take a monster out of the world (e.g. after it has been fought)."""
+        self.chunks[self.chunk_of(mon.x, mon.y)].remove(mon)
+        self.synced.pop(mon, None)
+        mon.despawn()
+
+    def activate(self, player_tile):
+        """Load the chunks around the player, pick the near ones and bring those up to date."""
+        pcx, pcy = self.chunk_of(*player_tile)
+        last_cx, last_cy = self.chunk_of(self.width - 1, self.height - 1)
+        keys = []
+        for cy in range(max(0, pcy - self.active_radius), min(last_cy, pcy + self.active_radius) + 1):
+            for cx in range(max(0, pcx - self.active_radius), min(last_cx, pcx + self.active_radius) + 1):
+                keys.append((cx, cy))
+        self.active = keys
+        for key in keys:
+            self.load_chunk(key)
+
+        old_near = self.near
+        self.near = [key for key in keys if self.is_near(key, player_tile)]
+        for key in old_near:
+            if key not in self.near and key in self.chunks:
+                # From now on these only keep count of the ticks they miss
+                for mon in self.chunks[key]:
+                    self.synced[mon] = self.tick
+        for key in self.near:
+            if key not in old_near:
+                self.catch_up(key)
+
+    def is_near(self, key, player_tile):
+        if self.near_radius is None:
+            return True
+        x0, y0, x1, y1 = self.chunk_bounds(key)
+        px, py = player_tile
+        r = self.near_radius
+        return x0 <= px + r and px - r < x1 and y0 <= py + r and py - r < y1
+
+    def catch_up(self, key):
+        """Move a chunk's monsters through every tick they missed, in one jump each."""
+        for mon in list(self.chunks[key]):
+            steps = self.tick - self.synced.pop(mon, self.tick)
+            if steps > 0:
+                mon.wander(steps)
+                self.rehome(mon, key)
+
+    def rehome(self, mon, old_key):
+        """Move a monster to the chunk list of the tile it now stands on."""
+        new_key = self.chunk_of(mon.x, mon.y)
+        if new_key != old_key:
+            self.chunks[old_key].remove(mon)
+            self.load_chunk(new_key).append(mon)
+            if new_key not in self.near:
+                self.synced[mon] = self.tick
+
+    def active_monsters(self):
+        """Return every monster in the loaded area around the player."""
+        monsters = []
+        for key in self.active:
+            monsters.extend(self.chunks[key])
+        return monsters
+
+    def near_monsters(self):
+        """Return the monsters that are stepped every tick."""
+        monsters = []
+        for key in self.near:
+            monsters.extend(self.chunks[key])
+        return monsters
+
+    def bounds_of(self, keys):
+        # keys are a rectangle of chunks in row order
+        x0, y0, _, _ = self.chunk_bounds(keys[0])
+        _, _, x1, y1 = self.chunk_bounds(keys[-1])
+        return x0, y0, x1, y1
+
+    def active_bounds(self):
+        """Return (x0, y0, x1, y1) covering the loaded area around the player, end exclusive."""
+        return self.bounds_of(self.active)
+
+    def near_bounds(self):
+        """Return (x0, y0, x1, y1) covering the chunks stepped every tick, end exclusive."""
+        return self.bounds_of(self.near)
+
+    def step(self, field=None):
+        """
+        Move every monster in the near chunks one step; the rest just miss a tick.
+
+        Parameters:
+            field (DistanceField, optional): Distances to the player, for monsters that chase or flee.
+        """
+        self.tick += 1
+        for mon in self.near_monsters():
+            old_key = self.chunk_of(mon.x, mon.y)
+            mon.act(field)
+            self.rehome(mon, old_key)